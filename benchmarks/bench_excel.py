@@ -0,0 +1,83 @@
+"""
+Time the Business Leads sheet export on 200, 10k and 100k clean leads.
+
+Compares the original export (iterrows and one worksheet.write per cell)
+with the constant_memory, write_row export and checks both workbooks hold
+the same cell values. Run from the project root:
+
+    python -m benchmarks.bench_excel
+"""
+
+import os
+import random
+import tempfile
+import time
+import openpyxl
+import pandas as pd
+import xlsxwriter
+from reports.generate_excel import LeadReportExcel
+
+
+def clean_leads(rows, seed=0):
+    """A frame shaped like LeadCleaner.clean_leads output."""
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        'name': [f'Business {i}' for i in range(rows)],
+        'phone': [f'+27 21 {rng.randrange(1000):03d} {rng.randrange(10000):04d}' for _ in range(rows)],
+        'address': [rng.choice(['12 Long St, Cape Town', 'Durban North', 'Sandton, GAUTENG', 'N/A'])
+                    for _ in range(rows)],
+        'category': 'plumbers',
+        'niche': 'plumbers',
+        'score': [rng.choice([0, 20, 30, 50, 60]) for _ in range(rows)],
+        'id': range(1, rows + 1),
+    })
+
+
+def legacy_generate(leads, filename):
+    """The Business Leads sheet as LeadReportExcel.generate wrote it before write_row."""
+    workbook = xlsxwriter.Workbook(filename)
+    worksheet = workbook.add_worksheet('Business Leads')
+    headers = ['ID', 'Business Name', 'Phone', 'Address', 'Category', 'Score']
+    for col_num, header in enumerate(headers):
+        worksheet.write(0, col_num, header)
+    for row_num, (_, row) in enumerate(leads.iterrows(), 1):
+        worksheet.write(row_num, 0, row.get('id', 'N/A'))
+        worksheet.write(row_num, 1, row.get('name', 'N/A'))
+        worksheet.write(row_num, 2, row.get('phone', 'N/A'))
+        worksheet.write(row_num, 3, row.get('address', 'N/A'))
+        worksheet.write(row_num, 4, row.get('category', 'N/A'))
+        worksheet.write(row_num, 5, row.get('score', 0))
+    workbook.close()
+
+
+def sheet_values(filename):
+    workbook = openpyxl.load_workbook(filename, read_only=True)
+    try:
+        return list(workbook['Business Leads'].iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+
+def main(sizes=(200, 10_000, 100_000)):
+    print(f"{'rows':>9} {'before s':>9} {'after s':>8} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        before_file = os.path.join(tmp, 'before.xlsx')
+        after_file = os.path.join(tmp, 'after.xlsx')
+        for rows in sizes:
+            df = clean_leads(rows)
+            generator = LeadReportExcel(df, 'basic')
+            generator.leads = df  # export every row, not just the package's
+
+            start = time.perf_counter()
+            legacy_generate(df, before_file)
+            before_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            generator.generate(after_file)
+            after_seconds = time.perf_counter() - start
+
+            assert sheet_values(after_file) == sheet_values(before_file)
+            print(f"{rows:>9,} {before_seconds:>9.2f} {after_seconds:>8.2f} {before_seconds / after_seconds:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
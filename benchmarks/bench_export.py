@@ -0,0 +1,51 @@
+"""
+Time raw-data exports of a 200k-lead niche from the lead store.
+
+Compares the streaming exporter (CSV and gzipped JSON lines) with reading
+the store cursor alone and with going through pandas (to_frame, to_csv),
+and reports the peak Python memory of each. Run from the project root:
+
+    python -m benchmarks.bench_export
+"""
+
+import os
+import tempfile
+import time
+import tracemalloc
+from benchmarks.bench_excel import clean_leads
+from reports.export_data import export_leads
+from store.lead_store import LeadStore
+
+
+def peak_memory(func):
+    """Peak bytes allocated by Python while func runs."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main(rows=200_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        store = LeadStore(os.path.join(tmp, 'leads.db'), batch_size=5000)
+        store.upsert(clean_leads(rows).to_dict('records'), niche='plumbers')
+        modes = [
+            ('cursor only', lambda: sum(1 for _ in store.iter_leads('plumbers'))),
+            ('stream csv', lambda: export_leads(store.iter_leads('plumbers'), os.path.join(tmp, 'leads.csv'))),
+            ('stream jsonl.gz', lambda: export_leads(store.iter_leads('plumbers'), os.path.join(tmp, 'leads.jsonl.gz'))),
+            ('pandas csv', lambda: store.to_frame('plumbers').to_csv(os.path.join(tmp, 'pandas.csv'), index=False)),
+        ]
+        print(f"{'mode':<16} {'seconds':>8} {'leads/s':>9} {'peak MB':>8}")
+        for name, func in modes:
+            start = time.perf_counter()
+            func()
+            seconds = time.perf_counter() - start
+            peak = peak_memory(func)  # a second run, as tracing slows it down
+            print(f"{name:<16} {seconds:>8.2f} {rows / seconds:>9,.0f} {peak / 2 ** 20:>8.1f}")
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
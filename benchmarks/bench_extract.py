@@ -0,0 +1,134 @@
+"""
+Listings per second for LeadScraper.extract_lead.
+
+Compares the original inline-regex extraction with scrapers.extract on the
+listing texts of the pages in benchmarks/fixtures plus some awkward
+synthetic listings, and checks both return the same leads. Run from the
+project root:
+
+    python -m benchmarks.bench_extract
+"""
+
+import glob
+import os
+import re
+import timeit
+from scrapers.extract import extract_lead_text
+from scrapers.parsing import find_listings
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Listings that exercise the skip keywords, phone precedence and address rules
+SYNTHETIC = [
+    'Premium User Acme Plumbing, 12 Long Street, Cape Town, 8001 021-555-1234',
+    'Open Now Bright Tutors 082 123 4567',
+    'Smith & Co Attorneys +27 1 234 567 890 or 011-123-4567',
+    'Sunrise Dental 27 123 4567 then 0821234567',
+    'Kimberley Diamonds, Main Road KIMBERLEY 5, call 053.831.1234',
+    'Ubuntu Realty, Durban, no street number',
+    'X1, 2, 3',
+    '1234567890',
+    'Big Sky Builders Ltd Home Services',
+    'Été Café Élégant, 3 Rue, Pretoria 0002',
+    'ab cd ef',
+    'Lone Name Without Commas 0123456789 extra',
+]
+
+
+def legacy_extract_lead(full_text, niche):
+    """LeadScraper.extract_lead as it was before scrapers.extract."""
+    skip_keywords = ['premium user', 'view details', 'operating:', 'open now', 'closed now',
+                    'previous next', 'the new yep!', '© yep!', 'waterproofing professionals',
+                    'home services', 'building contractors']
+    if any(keyword.lower() in full_text.lower() for keyword in skip_keywords):
+        return None
+
+    name = None
+    address = None
+    phone = None
+
+    lines = full_text.split(',')
+    if len(lines) >= 2:
+        potential_name = lines[0].strip()
+        if len(potential_name) > 3 and not potential_name.isdigit():
+            name = potential_name
+
+        for line in lines:
+            line = line.strip()
+            if (re.search(r'\d+', line) and
+                any(city in line.lower() for city in ['cape town', 'johannesburg', 'durban', 'pretoria', 'port elizabeth', 'bloemfontein', 'east london', 'kimberley']) or
+                re.search(r'\d{4}', line)):
+                address = line
+                break
+
+    if not name:
+        text = re.sub(r'^(premium user|[A-Z])', '', full_text).strip()
+        parts = text.split()
+        if parts:
+            name_parts = []
+            for part in parts[:5]:
+                if len(part) > 2 and not part.isdigit():
+                    name_parts.append(part)
+                else:
+                    break
+            name = ' '.join(name_parts) if name_parts else None
+
+    phone_patterns = [
+        r'\b\d{3}[-.\s]\d{3}[-.\s]\d{4}\b',
+        r'\b\d{10}\b',
+        r'\+\d{2}[-.\s]\d{1}[-.\s]\d{3}[-.\s]\d{3}[-.\s]\d{3}\b',
+        r'\d{2}[-.\s]\d{3}[-.\s]\d{4}',
+    ]
+
+    for pattern in phone_patterns:
+        phones = re.findall(pattern, full_text)
+        if phones:
+            phone = phones[0]
+            break
+
+    if name:
+        name = re.sub(r'\s+', ' ', name).strip()
+        if len(name) < 3 or name.isdigit():
+            name = None
+
+    if address:
+        address = re.sub(r'\s+', ' ', address).strip()
+
+    if name:
+        return {
+            'name': name,
+            'phone': phone or 'N/A',
+            'address': address or 'N/A',
+            'category': niche,
+            'niche': niche
+        }
+
+    return None
+
+
+def corpus():
+    texts = list(SYNTHETIC)
+    for path in sorted(glob.glob(os.path.join(FIXTURES, '*.html'))):
+        with open(path, encoding='utf-8') as f:
+            listings = find_listings(f.read())
+        texts.extend(listing.get_text(separator=' ', strip=True) for listing in listings)
+    return texts
+
+
+def listings_per_second(extract, texts, repeat):
+    seconds = min(timeit.repeat(lambda: [extract(text, 'plumbers') for text in texts], number=1, repeat=repeat))
+    return len(texts) / seconds
+
+
+def main(repeat=20):
+    texts = corpus()
+    for text in texts:
+        assert extract_lead_text(text, 'plumbers') == legacy_extract_lead(text, 'plumbers'), text
+    before = listings_per_second(legacy_extract_lead, texts, repeat)
+    after = listings_per_second(extract_lead_text, texts, repeat)
+    print(f"{'listings':>8} {'before/s':>12} {'after/s':>12} {'speedup':>8}")
+    print(f"{len(texts):>8} {before:>12,.0f} {after:>12,.0f} {after / before:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
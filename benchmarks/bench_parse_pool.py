@@ -0,0 +1,57 @@
+"""
+Pages per second when re-parsing cached pages, inline versus a ParsePool.
+
+Parses the pages in benchmarks/fixtures many times over, as a backfill from
+the page cache would, with 1, 2, 4... worker processes up to the number of
+cores, and checks every mode finds the same leads. Worker start-up is
+excluded. Run from the project root:
+
+    python -m benchmarks.bench_parse_pool
+"""
+
+import glob
+import os
+import time
+from scrapers.parse_pool import ParsePool, extract_page
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def load_pages(copies):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES, '*.html'))):
+        with open(path, encoding='utf-8') as f:
+            pages.append(f.read())
+    return pages * copies
+
+
+def main(copies=40):
+    pages = load_pages(copies)
+    start = time.perf_counter()
+    inline = [extract_page(html, 'plumbers') for html in pages]
+    inline_seconds = time.perf_counter() - start
+    print(f"{'mode':<16} {'pages':>6} {'pages/s':>9} {'speedup':>8}")
+    print(f"{'inline':<16} {len(pages):>6} {len(pages) / inline_seconds:>9,.0f} {1:>7.1f}x")
+
+    cores = os.cpu_count() or 1
+    counts = sorted({min(2 ** i, cores) for i in range(cores.bit_length() + 1)})
+    for workers in counts:
+        for ordered in [True, False]:
+            pool = ParsePool(workers, ordered)
+            try:
+                list(pool.map(pages[:workers], 'plumbers'))  # start the workers
+                start = time.perf_counter()
+                results = list(pool.map(pages, 'plumbers'))
+                seconds = time.perf_counter() - start
+            finally:
+                pool.close()
+            if ordered:
+                assert results == inline
+            else:
+                assert sorted(map(repr, results)) == sorted(map(repr, inline))
+            mode = f"{workers} {'ordered' if ordered else 'unordered'}"
+            print(f"{mode:<16} {len(pages):>6} {len(pages) / seconds:>9,.0f} {inline_seconds / seconds:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Parse time per page for the listing detection in LeadScraper.scrape_source.
+
+Compares the original full-tree html.parser search with scrapers.parsing on
+the saved directory pages in benchmarks/fixtures, and checks both find the
+same listings. The 'learned' column is a page of a source whose selector is
+already known (see scrapers.selector_memory). Run from the project root:
+
+    python -m benchmarks.bench_parsing
+"""
+
+import glob
+import os
+import re
+import timeit
+from bs4 import BeautifulSoup
+from scrapers.parsing import HTML_PARSER, candidate_listings, find_listings
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def legacy_find_listings(html):
+    """Listing detection as it was before scrapers.parsing."""
+    soup = BeautifulSoup(html, 'html.parser')
+    return (
+        soup.find_all('div', class_=re.compile(r'listing|business|agent|doctor|tutor')) or
+        soup.find_all('article', class_=re.compile(r'listing|business')) or
+        soup.find_all('li', class_=re.compile(r'listing|business')) or
+        soup.find_all('a', href=re.compile(r'/agent/|/doctor/|/tutor/|/business/'))
+    )
+
+
+def texts(listings):
+    return [listing.get_text(separator=' ', strip=True) for listing in listings]
+
+
+def best_ms(func, repeat):
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+
+def main(repeat=20):
+    pages = sorted(glob.glob(os.path.join(FIXTURES, '*.html')))
+    parsers = ['html.parser'] + ([HTML_PARSER] if HTML_PARSER != 'html.parser' else [])
+    header = f"{'page':<20} {'listings':>8} {'before ms':>10}"
+    for parser in parsers:
+        header += f" {parser + ' ms':>15} {'speedup':>8}"
+    header += f" {'learned ms':>11} {'speedup':>8}"
+    print(header)
+    for path in pages:
+        with open(path, encoding='utf-8') as f:
+            html = f.read()
+        legacy = texts(legacy_find_listings(html))
+        before = best_ms(lambda: legacy_find_listings(html), repeat)
+        line = f"{os.path.basename(path):<20} {len(legacy):>8} {before:>10.2f}"
+        for parser in parsers:
+            assert texts(find_listings(html, parser)) == legacy, (path, parser)
+            after = best_ms(lambda: find_listings(html, parser), repeat)
+            line += f" {after:>15.2f} {before / after:>7.1f}x"
+        selector, listings = next(candidate_listings(html))
+        assert texts(listings) == legacy, path
+        learned = best_ms(lambda: next(candidate_listings(html, preferred=selector)), repeat)
+        line += f" {learned:>11.2f} {before / learned:>7.1f}x"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Time LeadReportPDF.generate on 250, 2,500 and 10,000 leads.
+
+Compares the original rendering (_clean_text per cell, one table for every
+lead) with the chunked one (a column at a time, PDF_ROWS_PER_TABLE rows per
+table) and checks both put the same text in the table cells. Run from the
+project root:
+
+    python -m benchmarks.bench_pdf
+"""
+
+import os
+import tempfile
+import time
+import unicodedata
+import pandas as pd
+from unittest.mock import patch
+from benchmarks.bench_excel import clean_leads
+from reports.generate_pdf import LeadReportPDF, lead_table_rows
+
+
+def legacy_clean_text(text):
+    """LeadReportPDF._clean_text as it was before the translation table."""
+    if not text or pd.isna(text):
+        return 'N/A'
+    text = unicodedata.normalize('NFKD', str(text))
+    for unicode_char, ascii_char in {'\u2013': '-', '\u2014': '-', '\u2018': "'", '\u2019': "'",
+                                     '\u201c': '"', '\u201d': '"', '\u2026': '...'}.items():
+        text = text.replace(unicode_char, ascii_char)
+    return ''.join(char for char in text if ord(char) < 128).strip()
+
+
+def legacy_table_rows(leads):
+    """Table rows as LeadReportPDF.generate built them before cleaning a column at a time."""
+    rows = []
+    for _, row in leads.iterrows():
+        name = legacy_clean_text(row['name'])[:18]
+        phone = legacy_clean_text(row['phone'])[:12]
+        address = legacy_clean_text(row['address'])[:18]
+        category = legacy_clean_text(row['category'])[:10]
+        rows.append([str(row['id']), name, phone, address, category])
+    return rows
+
+
+def timed_generate(generator, filename, table_rows):
+    with patch('reports.generate_pdf.lead_table_rows', table_rows):
+        start = time.perf_counter()
+        generator.generate(filename)
+        return time.perf_counter() - start
+
+
+def main(sizes=(250, 2_500, 10_000)):
+    print(f"{'rows':>7} {'before s':>9} {'after s':>8} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'report.pdf')
+        for rows in sizes:
+            df = clean_leads(rows)
+            df.loc[::7, 'name'] = 'Café – “Best” Plumbing…'
+            before = LeadReportPDF(df, 'basic', rows_per_table=0)
+            after = LeadReportPDF(df, 'basic')
+            before.leads = after.leads = df  # render every lead, as for a custom order
+
+            assert lead_table_rows(df) == legacy_table_rows(df)
+            before_seconds = timed_generate(before, filename, legacy_table_rows)
+            after_seconds = timed_generate(after, filename, lead_table_rows)
+            print(f"{rows:>7,} {before_seconds:>9.2f} {after_seconds:>8.2f} {before_seconds / after_seconds:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
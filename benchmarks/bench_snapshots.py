@@ -0,0 +1,57 @@
+"""
+Time reloading lead history from snapshots on 100k clean leads.
+
+Writes a week of snapshots for four niches in each format, then times
+loading all of it and one niche-day, against parsing the same leads back
+from an Excel export. Run from the project root:
+
+    python -m benchmarks.bench_snapshots
+"""
+
+import os
+import tempfile
+import time
+import pandas as pd
+import xlsxwriter
+from benchmarks.bench_excel import clean_leads
+from reports.generate_excel import lead_rows, write_lead_rows
+from store.snapshots import LeadSnapshots
+
+NICHES = ['real_estate_agents', 'tutors_education', 'service_providers', 'healthcare_professionals']
+DATES = [f'2026-10-{day:02d}' for day in range(12, 19)]
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main(rows=100_000):
+    df = clean_leads(rows)
+    chunk = rows // (len(NICHES) * len(DATES))
+    print(f"{'load':<24} {'rows':>8} {'ms':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for format in ['parquet', 'feather']:
+            snapshots = LeadSnapshots(os.path.join(tmp, format), format)
+            start = 0
+            for niche in NICHES:
+                for date in DATES:
+                    snapshots.write(df.iloc[start:start + chunk], niche, date)
+                    start += chunk
+            snapshots.load()  # warm the page cache, as for a file read before
+            everything, seconds = timed(snapshots.load)
+            print(f"{format + ' all':<24} {len(everything):>8,} {seconds * 1000:>9.1f}")
+            one, seconds = timed(lambda: snapshots.load(NICHES[0], since=DATES[-1], until=DATES[-1]))
+            print(f"{format + ' one niche-day':<24} {len(one):>8,} {seconds * 1000:>9.1f}")
+
+        filename = os.path.join(tmp, 'leads.xlsx')
+        workbook = xlsxwriter.Workbook(filename, {'constant_memory': True})
+        write_lead_rows(workbook, lead_rows(df))
+        workbook.close()
+        parsed, seconds = timed(lambda: pd.read_excel(filename))
+        print(f"{'xlsx all':<24} {len(parsed):>8,} {seconds * 1000:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,45 +1,52 @@
 import pandas as pd
 import re
-from config import TARGET_REGION
+from cleaner.dedupe import FuzzyDeduper
+from config import TARGET_REGION, FUZZY_DEDUPE
+
+# Major South African cities and provinces used for region filtering
+SA_REGIONS = [
+    'johannesburg', 'cape town', 'durban', 'pretoria', 'port elizabeth',
+    'bloemfontein', 'east london', 'kimberley', 'pietermaritzburg',
+    'gauteng', 'western cape', 'kwazulu-natal', 'eastern cape',
+    'free state', 'north west', 'limpopo', 'mpumalanga', 'northern cape'
+]
 
 class LeadCleaner:
-    def __init__(self):
-        pass
+    def __init__(self, fuzzy_dedupe=None):
+        if TARGET_REGION.lower() == 'south africa':
+            self.region_pattern = '|'.join(SA_REGIONS)
+        else:
+            self.region_pattern = TARGET_REGION
+        self.region_regex = re.compile(self.region_pattern, re.IGNORECASE)
+        # Also merge near-duplicates (see cleaner.dedupe); defaults to FUZZY_DEDUPE
+        if fuzzy_dedupe is None:
+            fuzzy_dedupe = FUZZY_DEDUPE
+        self.deduper = FuzzyDeduper() if fuzzy_dedupe else None
 
     def clean_leads(self, df):
         """
         Clean and filter the leads DataFrame, add quality scoring.
+        Works on whole columns; see clean_phone and calculate_lead_score
+        for the per-lead rules.
         """
         if df.empty:
             return df
 
-        # Remove duplicates based on name and phone
-        df = df.drop_duplicates(subset=['name', 'phone'], keep='first')
+        # Keep the first of each name and phone pair whose address is in the
+        # target region (major cities/provinces for South Africa) or missing
+        keep = ~df.duplicated(subset=['name', 'phone'], keep='first')
+        address = df['address']
+        keep &= address.str.contains(self.region_regex, na=False) | address.isnull()
 
-        # Clean phone numbers
-        df['phone'] = df['phone'].apply(self.clean_phone)
+        # Fill missing values on the filtered rows; this is a new frame, not a view
+        df = df[keep].fillna('N/A')
 
-        # Filter by region - more inclusive for South Africa
-        if TARGET_REGION.lower() == 'south africa':
-            # For South Africa, check for major cities/provinces
-            sa_regions = [
-                'johannesburg', 'cape town', 'durban', 'pretoria', 'port elizabeth',
-                'bloemfontein', 'east london', 'kimberley', 'pietermaritzburg',
-                'gauteng', 'western cape', 'kwazulu-natal', 'eastern cape',
-                'free state', 'north west', 'limpopo', 'mpumalanga', 'northern cape'
-            ]
-            region_filter = df['address'].str.contains('|'.join(sa_regions), na=False, case=False)
-        else:
-            # For other regions, check for exact region match
-            region_filter = df['address'].str.contains(TARGET_REGION, na=False, case=False)
+        # Merge the same business listed under different names or by different sources
+        if self.deduper is not None:
+            df = self.deduper.dedupe_frame(df)
 
-        df = df[region_filter | df['address'].isnull()]
-
-        # Fill missing values
-        df = df.fillna('N/A')
-
-        # Add quality score
-        df['score'] = df.apply(self.calculate_lead_score, axis=1)
+        df['phone'] = self.clean_phones(df['phone'])
+        df['score'] = self.score_leads(df)
 
         # Sort by score descending
         df = df.sort_values('score', ascending=False)
@@ -50,6 +57,70 @@ class LeadCleaner:
 
         return df
 
+    def clean_phones(self, phones):
+        """Vectorized clean_phone for a Series of phone numbers."""
+        phones = phones.where(phones.astype(bool), 'N/A')
+        digits = phones.str.replace(r'\D', '', regex=True)
+        length = digits.str.len()
+        # Offset of the 9 local digits after a leading 0 or 27; -1 leaves the number as is
+        offset = pd.Series(-1, index=phones.index)
+        offset[length == 9] = 0
+        offset[(length == 10) & digits.str.startswith('0', na=False)] = 1
+        offset[(length == 12) & digits.str.startswith('27', na=False)] = 2
+
+        cleaned = phones.copy()
+        for start in (0, 1, 2):
+            rows = offset == start
+            if rows.any():
+                local = digits[rows].str[start:]
+                cleaned[rows] = '0' + local.str[0:2] + ' ' + local.str[2:5] + ' ' + local.str[5:]
+        return cleaned
+
+    def score_leads(self, df):
+        """Vectorized calculate_lead_score for a cleaned DataFrame."""
+        has_phone = df['phone'].astype(bool) & (df['phone'] != 'N/A')
+        has_address = df['address'].astype(bool) & (df['address'] != 'N/A')
+        return 30 * has_phone.astype(int) + 25 * has_address.astype(int)
+
+    def iter_clean(self, leads):
+        """
+        Lazily yield the raw leads that clean_leads would keep: the first of
+        each (name, phone) pair whose address is missing or in the target region,
+        and, with fuzzy dedupe, not a near-duplicate of an earlier lead.
+        Pull from this to stop a crawl as soon as enough clean leads exist.
+        """
+        leads = self._iter_unique_in_region(leads)
+        if self.deduper is not None:
+            leads = self.deduper.stream(leads)
+        return leads
+
+    def _iter_unique_in_region(self, leads):
+        seen = set()
+        for lead in leads:
+            key = (lead.get('name'), lead.get('phone'))
+            if key in seen:
+                continue
+            seen.add(key)
+            address = lead.get('address')
+            if address is None or pd.isna(address) or self.region_regex.search(str(address)):
+                yield lead
+
+    def normalize_lead(self, lead):
+        """
+        Clean one lead the way clean_leads cleans a row: formatted phone,
+        'N/A' for missing values and a quality score. Returns a new dict.
+        """
+        lead = {key: 'N/A' if value is None or (isinstance(value, float) and pd.isna(value)) else value
+                for key, value in lead.items()}
+        lead['phone'] = self.clean_phone(lead.get('phone'))
+        lead['score'] = self.calculate_lead_score(lead)
+        return lead
+
+    def stream_clean(self, leads):
+        """Lazily dedupe, region-filter, normalize and score leads."""
+        for lead in self.iter_clean(leads):
+            yield self.normalize_lead(lead)
+
     def calculate_lead_score(self, lead):
         """
         Calculate lead quality score.
@@ -0,0 +1,173 @@
+import re
+from collections import defaultdict
+from difflib import SequenceMatcher
+import pandas as pd
+from config import FUZZY_NAME_THRESHOLD, FUZZY_PHONE_NAME_THRESHOLD, FUZZY_BLOCK_WINDOW
+
+# Company-form words dropped from names before comparing, e.g. "ABC Realty (Pty) Ltd"
+LEGAL_SUFFIXES = {'pty', 'ltd', 'limited', 'proprietary', 'cc', 'inc', 'llc', 'npc', 'co', 'company'}
+
+NON_WORD = re.compile(r'[^a-z0-9 ]+')
+NON_DIGIT = re.compile(r'\D')
+
+# Field values that count as missing when merging
+MISSING = (None, '', 'N/A')
+
+
+def normalize_name(name):
+    """Lowercase a business name and drop punctuation and legal suffixes."""
+    if not isinstance(name, str):
+        return ''
+    words = NON_WORD.sub(' ', name.lower().replace('&', ' and ')).split()
+    while words and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    if words and words[0] == 'the':
+        words = words[1:]
+    return ' '.join(words)
+
+
+def normalize_phone(phone):
+    """South African phone number as 10 local digits, other numbers as bare digits, or ''."""
+    if not isinstance(phone, str):
+        return ''
+    digits = NON_DIGIT.sub('', phone)
+    if len(digits) == 11 and digits.startswith('27'):
+        return '0' + digits[2:]
+    if len(digits) == 9:
+        return '0' + digits
+    return digits if len(digits) >= 7 else ''
+
+
+def is_missing(value):
+    return value in MISSING or (isinstance(value, float) and pd.isna(value))
+
+
+class FuzzyDeduper:
+    """
+    Finds leads that are the same business under slightly different names,
+    e.g. "ABC Realty (Pty) Ltd" on one source and "ABC Realty" on another.
+
+    Only leads that share a block are compared: the same phone number or the
+    same first name word. Blocks larger than the window are compared by
+    sorted neighbourhood, each lead against its neighbours in name order, so
+    the work grows with the number of leads rather than its square. Leads
+    with different phone numbers are never merged; they are branches.
+    """
+
+    def __init__(self, name_threshold=FUZZY_NAME_THRESHOLD, phone_name_threshold=FUZZY_PHONE_NAME_THRESHOLD,
+                 window=FUZZY_BLOCK_WINDOW):
+        self.name_threshold = name_threshold
+        self.phone_name_threshold = phone_name_threshold
+        self.window = window
+
+    @staticmethod
+    def keys(lead):
+        """(normalized name, normalized phone) used for blocking and matching."""
+        return normalize_name(lead.get('name')), normalize_phone(lead.get('phone'))
+
+    @staticmethod
+    def blocks(name, phone):
+        if phone:
+            yield 'phone:' + phone
+        if name:
+            yield 'name:' + name.split(' ', 1)[0]
+
+    def is_match(self, a, b):
+        """Whether two (name, phone) keys are the same business."""
+        (name_a, phone_a), (name_b, phone_b) = a, b
+        if phone_a and phone_b and phone_a != phone_b:
+            return False
+        if name_a == name_b:
+            return bool(name_a or phone_a)
+        if not name_a or not name_b:
+            return False
+        threshold = self.phone_name_threshold if phone_a and phone_a == phone_b else self.name_threshold
+        matcher = SequenceMatcher(None, name_a, name_b)
+        # Cheap upper bounds first; most candidate pairs fail these
+        return (matcher.real_quick_ratio() >= threshold and matcher.quick_ratio() >= threshold and
+                matcher.ratio() >= threshold)
+
+    def clusters(self, leads):
+        """Group lead indexes into duplicates. Returns lists of indexes, each in lead order."""
+        keys = [self.keys(lead) for lead in leads]
+        parent = list(range(len(leads)))
+        phones = [phone for _, phone in keys]  # Each group's phone, kept at its root
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        blocks = defaultdict(list)
+        for i, (name, phone) in enumerate(keys):
+            for block in self.blocks(name, phone):
+                blocks[block].append(i)
+
+        for members in blocks.values():
+            if len(members) < 2:
+                continue
+            if len(members) > self.window:
+                members = sorted(members, key=lambda i: keys[i][0])
+            for pos, i in enumerate(members):
+                for j in members[pos + 1:pos + 1 + self.window]:
+                    root_i, root_j = find(i), find(j)
+                    if root_i == root_j or (phones[root_i] and phones[root_j] and phones[root_i] != phones[root_j]):
+                        continue
+                    if self.is_match(keys[i], keys[j]):
+                        root, other = min(root_i, root_j), max(root_i, root_j)
+                        parent[other] = root
+                        phones[root] = phones[root] or phones[other]
+
+        groups = defaultdict(list)
+        for i in range(len(leads)):
+            groups[find(i)].append(i)
+        return sorted(groups.values())
+
+    @staticmethod
+    def merge(group):
+        """
+        One lead from a group of duplicates: the first lead, with missing
+        fields taken from the others and the most detailed address.
+        """
+        merged = dict(group[0])
+        for lead in group[1:]:
+            for field, value in lead.items():
+                if is_missing(merged.get(field)) and not is_missing(value):
+                    merged[field] = value
+        addresses = [lead.get('address') for lead in group if not is_missing(lead.get('address'))]
+        if addresses:
+            merged['address'] = max(addresses, key=len)
+        return merged
+
+    def dedupe(self, leads):
+        """Merge duplicate leads. Returns one lead per business, in order of first appearance."""
+        leads = list(leads)
+        return [self.merge([leads[i] for i in group]) for group in self.clusters(leads)]
+
+    def dedupe_frame(self, df):
+        """dedupe for a DataFrame of leads, keeping the index of each group's first row."""
+        if df.empty:
+            return df
+        leads = df.to_dict('records')
+        groups = self.clusters(leads)
+        merged = [self.merge([leads[i] for i in group]) for group in groups]
+        return pd.DataFrame(merged, index=df.index[[group[0] for group in groups]], columns=df.columns)
+
+    def stream(self, leads):
+        """
+        Lazily yield leads that do not duplicate an earlier one. Unlike
+        dedupe, the first lead is kept as it is, since it has already been
+        passed on; each lead is compared with the last window leads of its blocks.
+        """
+        blocks = defaultdict(list)
+        for lead in leads:
+            key = self.keys(lead)
+            block_keys = list(self.blocks(*key))
+            duplicate = any(self.is_match(key, other)
+                            for block in block_keys for other in blocks[block][-self.window:])
+            if duplicate:
+                continue
+            for block in block_keys:
+                blocks[block].append(key)
+            yield lead
@@ -28,10 +28,39 @@ PRICES = {
 # Target region
 TARGET_REGION = 'South Africa'
 
+# Fuzzy deduplication: merge the same business listed under slightly different names or sources
+FUZZY_DEDUPE = True
+FUZZY_NAME_THRESHOLD = 0.9  # Name similarity (0-1) needed to merge leads without a shared phone
+FUZZY_PHONE_NAME_THRESHOLD = 0.6  # Name similarity needed to merge leads with the same phone
+FUZZY_BLOCK_WINDOW = 20  # Larger candidate blocks only compare each lead with this many name-sorted neighbours
+
 # Ethical scraping settings
 RATE_LIMIT_SECONDS = 2  # 1 request per 2 seconds
 RESPECT_ROBOTS_TXT = True
+ROBOTS_TTL_HOURS = 24  # How long a host's robots.txt rules are reused
+ROBOTS_NEGATIVE_TTL_HOURS = 1  # Recheck hosts whose robots.txt could not be fetched or gave a server error after this
 CACHE_ENABLED = True
+CACHE_FILE = 'scraper_cache.db'
+LEGACY_CACHE_FILE = 'scraper_cache.json'  # Imported into CACHE_FILE on first run
+CACHE_COMMIT_EVERY = 20  # Pages written per SQLite transaction
+CACHE_COMPRESSION_LEVEL = 6  # zlib level for cached page bodies
+CACHE_MAX_BYTES = 200 * 1024 * 1024  # Least recently used pages are evicted beyond this
+HTTP_CONNECT_TIMEOUT = 5  # Seconds to establish a connection
+HTTP_READ_TIMEOUT = 10  # Seconds to wait for response data
+HTTP_POOL_HOSTS = 10  # Hosts with a kept-alive connection pool
+HTTP_POOL_MAXSIZE = 2  # Connections kept alive per host
+HTTP_MAX_RETRIES = 3  # Retries on connection errors and HTTP_RETRY_STATUSES
+HTTP_BACKOFF_SECONDS = 1  # Base of the jittered exponential backoff between retries
+HTTP_BACKOFF_MAX_SECONDS = 60  # Cap on any single backoff or Retry-After wait
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_CONCURRENCY = 4  # Sources crawled in parallel; each host is still rate limited on its own
+MAX_LEADS_PER_SCRAPE = 500  # Stop crawling a niche once this many raw leads are found
+LEAD_BUFFER_SIZE = 100  # Leads crawl threads may get ahead of the consumer of iter_leads
+PARSE_WORKERS = 0  # Processes parsing fetched pages; 0 parses on the crawl threads, None uses every core
+PARSE_ORDERED = True  # Emit each source's pages in page order; False emits pages as soon as they are parsed
+FRONTIER_CHECKPOINT_PAGES = 10  # Crawl progress is committed after this many pages, so a crash loses at most these
+DAILY_UPDATE_CONCURRENCY = 4  # Niches the daily update crawls at once, sharing one scraper and its host throttle
+DAILY_UPDATE_DEADLINE_MINUTES = 60  # The daily update stops crawling after this long and saves what it has
 DESCRIPTIVE_USER_AGENT = 'LeadGenerationBot/1.0 (Educational Research; contact@yamkela-macwili.com)'
 
 # Package features
@@ -41,6 +70,13 @@ PACKAGE_FEATURES = {
     'premium': ['PDF + Excel + Analytics', 'Response predictions', 'Geographic heat maps', 'Competitor analysis', '24-hour freshness']
 }
 
+# Maximum age (hours) of cached pages used to build each package, matching the freshness above
+PACKAGE_FRESHNESS_HOURS = {
+    'basic': 72,
+    'standard': 48,
+    'premium': 24
+}
+
 # Niche-specific data sources
 NICHE_SOURCES = {
     'real_estate_agents': [
@@ -121,9 +157,19 @@ CATEGORY_MAPPINGS = {
 # Minimum leads required per source before moving to next
 MIN_LEADS_PER_SOURCE = 10
 
+# Quota-aware crawling: raw leads crawled = package leads / expected source yield * headroom
+DEFAULT_SOURCE_YIELD = 0.5  # Fraction of raw leads assumed to survive cleaning for a new source
+MIN_SOURCE_YIELD = 0.1  # Floor on learned yields so one bad run cannot blow up the crawl
+YIELD_HISTORY_WEIGHT = 0.5  # Weight of past runs when updating a source's yield
+TARGET_HEADROOM = 1.2  # Extra raw leads on top of the yield estimate
+
 # Output directories
 REPORTS_DIR = 'reports/'
 EXPORTS_DIR = 'exports/'
+PDF_ROWS_PER_TABLE = 30  # Leads per table in PDF reports, about a page; 0 renders one table
+REPORT_TEMPLATE_VERSION = 1  # Bump when report layout changes so reports already built are not reused
+REPORT_WORKERS = 2  # Processes rendering a package's PDF and Excel files side by side; 0 renders them in turn
+REPORT_POOL_MIN_ROWS = 2000  # Fewer report rows than this render inline, as starting worker processes would cost more
 
 # Contact info for footer
 BUSINESS_CONTACT = {
@@ -131,3 +177,27 @@ BUSINESS_CONTACT = {
     'phone': '+27 12 345 6789', 
     'email': 'leadgen@gmail.com'
 }
+
+# Streaming pipeline: leads flow through cleaning and into sinks in batches of this size
+PIPELINE_BATCH_SIZE = 100
+
+# Refresh scheduler (run.py mode 2): refreshes each (niche, source) before its leads breach the package freshness
+SCHEDULE_PACKAGES = {}  # Packages sold per niche, e.g. {'tutors_education': ['basic']}; unlisted niches get all packages
+REFRESH_MARGIN_HOURS = 2  # Refresh a source this long before its freshest leads would get too old
+SCHEDULER_PAGES_PER_TASK = 2  # Pages crawled per (niche, source) refresh
+SCHEDULER_PAGES_PER_HOUR = 60  # Crawl budget: pages the scheduler may crawl in any hour
+SCHEDULER_RETRY_MINUTES = 60  # Wait before retrying a refresh that failed
+
+# Lead store: clean leads kept across runs so packages can be served without a crawl
+LEAD_STORE_FILE = 'leads.db'
+LEAD_STORE_BATCH_SIZE = 500  # Leads written per upsert transaction
+PACKAGE_MAX_PAGES = 5  # Pages of each source crawled when topping up the store for a package
+
+# Lead snapshots (store/snapshots.py): columnar history of clean leads for analytics; needs pyarrow
+SNAPSHOT_DIR = 'snapshots/'
+SNAPSHOT_FORMAT = 'parquet'  # 'parquet' (compact) or 'feather' (uncompressed Arrow, memory-mapped as is)
+SNAPSHOT_LEADS = True  # Snapshot each niche's clean leads after a refresh, when pyarrow is installed
+
+# Raw data exports (reports/export_data.py): CSV or gzipped JSON lines for bulk deliveries
+EXPORT_CHUNK_SIZE = 5000  # Leads held in memory and written at a time
+EXPORT_GZIP_LEVEL = 6  # gzip compression of .jsonl.gz exports, 1 (fastest) to 9 (smallest)
@@ -0,0 +1,87 @@
+"""
+Streaming lead pipeline.
+
+Leads flow from a lead iterator (LeadScraper.iter_leads) through dedupe,
+region filtering, normalization and scoring in fixed-size batches, and each
+batch is handed to one or more sinks. Nothing holds the whole crawl in
+memory: sinks decide what to keep, e.g. TopKSink keeps only the best k leads.
+"""
+
+import heapq
+from collections import Counter
+from itertools import count, islice
+import pandas as pd
+from cleaner.cleaner import LeadCleaner
+from config import PIPELINE_BATCH_SIZE
+
+
+def batched(iterable, size):
+    """Yield lists of up to size items from iterable."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class TopKSink:
+    """Keeps the k highest-scoring leads seen, in a bounded min-heap."""
+
+    def __init__(self, k):
+        self.k = k
+        self._heap = []
+        self._order = count()  # Earlier leads win score ties, as in a stable sort
+
+    def write(self, batch):
+        for lead in batch:
+            # Heap is ordered by (score, -arrival) so the root is the lead to drop first
+            entry = (lead['score'], -next(self._order), lead)
+            if len(self._heap) < self.k:
+                heapq.heappush(self._heap, entry)
+            elif entry[:2] > self._heap[0][:2]:
+                heapq.heapreplace(self._heap, entry)
+
+    def __len__(self):
+        return len(self._heap)
+
+    def rows(self):
+        """Kept leads, best first, numbered from 1 like clean_leads."""
+        ranked = sorted(self._heap, key=lambda entry: entry[:2], reverse=True)
+        return [dict(lead, id=i) for i, (_, _, lead) in enumerate(ranked, 1)]
+
+    def to_frame(self):
+        return pd.DataFrame(self.rows())
+
+
+class LeadPipeline:
+    """Runs leads through LeadCleaner's streaming stages into sinks, batch by batch."""
+
+    def __init__(self, cleaner=None, batch_size=PIPELINE_BATCH_SIZE):
+        self.cleaner = cleaner or LeadCleaner()
+        self.batch_size = batch_size
+        self.raw_counts = Counter()  # Raw leads seen per source
+        self.kept_counts = Counter()  # Clean leads emitted per source
+
+    def _count_raw(self, leads):
+        for lead in leads:
+            self.raw_counts[lead.get('source')] += 1
+            yield lead
+
+    def batches(self, leads, limit=None):
+        """Yield batches of clean, scored leads; stop pulling after limit clean leads."""
+        clean = self.cleaner.stream_clean(self._count_raw(leads))
+        if limit is not None:
+            clean = islice(clean, limit)
+        for batch in batched(clean, self.batch_size):
+            self.kept_counts.update(lead.get('source') for lead in batch)
+            yield batch
+
+    def run(self, leads, sinks, limit=None):
+        """Feed every batch to every sink. Returns the number of clean leads."""
+        total = 0
+        for batch in self.batches(leads, limit):
+            for sink in sinks:
+                sink.write(batch)
+            total += len(batch)
+        return total
@@ -0,0 +1,87 @@
+import csv
+import gzip
+import json
+import os
+from itertools import count
+import pandas as pd
+from config import EXPORTS_DIR, EXPORT_CHUNK_SIZE, EXPORT_GZIP_LEVEL
+from pipeline import batched
+from reports.generate_excel import COLUMNS, HEADERS
+
+# Column header -> (lead field, value when the lead lacks it), as in the Excel export
+FIELDS = dict(zip(HEADERS, COLUMNS))
+FORMATS = {'csv': '.csv', 'jsonl': '.jsonl.gz'}
+
+
+def export_format(filename):
+    """'csv' or 'jsonl' from a file name ending in .csv or .jsonl.gz."""
+    for format, extension in FORMATS.items():
+        if filename.endswith(extension):
+            return format
+    raise ValueError(f"Cannot tell the export format of {filename}: expected {' or '.join(FORMATS.values())}")
+
+
+def export_leads(leads, filename, columns=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Stream lead dicts from any iterable (a store query, a pipeline) to CSV or
+    gzipped JSON lines, chosen by the file name, chunk_size leads at a time.
+    columns picks and orders the columns by their Excel headers (default:
+    all of HEADERS). Leads without an id are numbered in order. The file
+    appears complete or not at all. Returns the number of leads written.
+    """
+    columns = list(columns or HEADERS)
+    unknown = [column for column in columns if column not in FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown export columns {unknown}, expected some of {HEADERS}")
+    format = export_format(filename)
+    fields = [FIELDS[column] for column in columns]
+    numbers = count(1)
+
+    def rows(batch):
+        for lead, number in zip(batch, numbers):
+            row = []
+            for field, default in fields:
+                value = lead.get(field)
+                row.append(value if value is not None else number if field == 'id' else default)
+            yield row
+
+    root, extension = filename[:-len(FORMATS[format])], FORMATS[format]
+    partial = f"{root}.{os.getpid()}.partial{extension}"
+    written = 0
+    try:
+        if format == 'csv':
+            with open(partial, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                for batch in batched(leads, chunk_size):
+                    writer.writerows(rows(batch))
+                    written += len(batch)
+        else:
+            with gzip.open(partial, 'wt', encoding='utf-8', compresslevel=EXPORT_GZIP_LEVEL) as f:
+                for batch in batched(leads, chunk_size):
+                    f.write(''.join(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + '\n'
+                                    for row in rows(batch)))
+                    written += len(batch)
+        os.replace(partial, filename)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return written
+
+
+def export_raw(store, filename=None, format=None, niche=None, max_age_hours=None, region=None, columns=None):
+    """
+    Export the stored leads matching the filters, best score first, straight
+    from the store cursor. The format defaults to the file name's, or csv;
+    a format the file name does not match raises ValueError. Returns the
+    file written.
+    """
+    if filename is None:
+        format = format or 'csv'
+        filename = f"{EXPORTS_DIR}{niche or 'all'}_leads_{pd.Timestamp.now().strftime('%Y%m%d')}{FORMATS[format]}"
+    elif format is not None and export_format(filename) != format:
+        raise ValueError(f"{filename} is not a {format} file name: expected it to end in {FORMATS[format]}")
+    os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+    written = export_leads(store.iter_leads(niche, max_age_hours, region), filename, columns)
+    print(f"Exported {written} leads to {filename}")
+    return filename
@@ -2,6 +2,57 @@ import pandas as pd
 import xlsxwriter
 from config import EXPORTS_DIR, PACKAGE_LEADS
 
+HEADERS = ['ID', 'Business Name', 'Phone', 'Address', 'Category', 'Score']
+# Lead field behind each column and the value written when a frame lacks it
+COLUMNS = [('id', 'N/A'), ('name', 'N/A'), ('phone', 'N/A'), ('address', 'N/A'), ('category', 'N/A'), ('score', 0)]
+MAX_SHEET_ROWS = 1_048_575  # Excel's row limit, less the header row
+
+
+def lead_rows(df):
+    """Export rows of a lead frame, read a column at a time as native Python values."""
+    columns = [df[field].tolist() if field in df else [default] * len(df) for field, default in COLUMNS]
+    return zip(*columns)
+
+
+def write_lead_rows(workbook, rows, title='Business Leads'):
+    """
+    Write rows under the headers, one write_row call per row, starting a
+    new worksheet whenever one is full. Returns the number of rows written.
+    """
+    worksheet = None
+    written = 0
+    for row in rows:
+        row_num = written % MAX_SHEET_ROWS + 1
+        if worksheet is None or row_num == 1:
+            sheet = written // MAX_SHEET_ROWS + 1
+            worksheet = workbook.add_worksheet(title if sheet == 1 else f'{title} {sheet}')
+            worksheet.write_row(0, 0, HEADERS)
+        worksheet.write_row(row_num, 0, row)
+        written += 1
+    if worksheet is None:
+        workbook.add_worksheet(title).write_row(0, 0, HEADERS)
+    return written
+
+
+def export_store(store, filename=None, niche=None, max_age_hours=None, region=None):
+    """
+    Stream every stored lead matching the filters into a workbook, best
+    score first. Rows are flushed to disk as they are written, so exports of
+    hundreds of thousands of leads need little memory.
+    """
+    if filename is None:
+        filename = f"{EXPORTS_DIR}{niche or 'all'}_store_{pd.Timestamp.now().strftime('%Y%m%d')}.xlsx"
+    rows = ((number, lead['name'], lead['phone'], lead['address'], lead['category'] or 'N/A', lead['score'])
+            for number, lead in enumerate(store.iter_leads(niche, max_age_hours, region), 1))
+    workbook = xlsxwriter.Workbook(filename, {'constant_memory': True})
+    try:
+        written = write_lead_rows(workbook, rows)
+    finally:
+        workbook.close()
+    print(f"Exported {written} leads to {filename}")
+    return filename
+
+
 class LeadReportExcel:
     def __init__(self, df, package):
         self.package = package
@@ -11,23 +62,11 @@ class LeadReportExcel:
         if filename is None:
             filename = f"{EXPORTS_DIR}{self.package}_leads_{pd.Timestamp.now().strftime('%Y%m%d')}.xlsx"
 
-        # Create workbook with xlsxwriter
-        workbook = xlsxwriter.Workbook(filename)
-        worksheet = workbook.add_worksheet('Business Leads')
-
-        # Add headers
-        headers = ['ID', 'Business Name', 'Phone', 'Address', 'Category', 'Score']
-        for col_num, header in enumerate(headers):
-            worksheet.write(0, col_num, header)
-
-        # Write data
-        for row_num, (_, row) in enumerate(self.leads.iterrows(), 1):
-            worksheet.write(row_num, 0, row.get('id', 'N/A'))
-            worksheet.write(row_num, 1, row.get('name', 'N/A'))
-            worksheet.write(row_num, 2, row.get('phone', 'N/A'))
-            worksheet.write(row_num, 3, row.get('address', 'N/A'))
-            worksheet.write(row_num, 4, row.get('category', 'N/A'))
-            worksheet.write(row_num, 5, row.get('score', 0))
+        # Create workbook with xlsxwriter, flushing each row to disk once written
+        workbook = xlsxwriter.Workbook(filename, {'constant_memory': True})
+
+        # Write headers and data
+        write_lead_rows(workbook, lead_rows(self.leads))
 
         # Add analytics sheet for premium
         if self.package == 'premium':
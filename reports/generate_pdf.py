@@ -10,44 +10,95 @@ import sys
 
 # Add parent directory to path to import config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import PACKAGE_LEADS, TARGET_REGION, SELECTED_NICHE, BUSINESS_CONTACT, REPORTS_DIR, PACKAGE_FEATURES
+from config import (PACKAGE_LEADS, TARGET_REGION, SELECTED_NICHE, BUSINESS_CONTACT, REPORTS_DIR, PACKAGE_FEATURES,
+                    PDF_ROWS_PER_TABLE)
+
+# Common Unicode punctuation and its ASCII equivalent
+PUNCTUATION = str.maketrans({
+    '\u2013': '-',  # en dash
+    '\u2014': '-',  # em dash
+    '\u2018': "'",  # left single quotation mark
+    '\u2019': "'",  # right single quotation mark
+    '\u201c': '"',  # left double quotation mark
+    '\u201d': '"',  # right double quotation mark
+    '\u2026': '...',  # horizontal ellipsis
+})
+
+TABLE_HEADERS = ['ID', 'Business Name', 'Phone', 'Address', 'Category']
+# Lead field shown in each column after the ID, and the characters kept of it
+TABLE_FIELDS = [('name', 18), ('phone', 12), ('address', 18), ('category', 10)]
+TABLE_COL_WIDTHS = [0.5*inch, 1.5*inch, 1*inch, 1.5*inch, 1*inch]
+
+# Built once and shared by every table: the first carries the header row, the rest continue it
+HEADER_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+])
+BODY_TABLE_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('BACKGROUND', (0, 0), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+])
+
+
+def clean_text(text):
+    """Clean text to handle Unicode characters for PDF generation."""
+    if not text or pd.isna(text):
+        return 'N/A'
+    # Normalize Unicode, replace common punctuation, then drop any remaining non-ASCII characters
+    text = unicodedata.normalize('NFKD', str(text)).translate(PUNCTUATION)
+    return text.encode('ascii', 'ignore').decode('ascii').strip()
+
+
+def clean_column(values, width=None):
+    """clean_text over a whole column at once, cut to width characters."""
+    filled = values.fillna('')
+    missing = ~filled.astype(bool)
+    text = (filled.astype(str).str.normalize('NFKD').str.translate(PUNCTUATION)
+            .str.encode('ascii', 'ignore').str.decode('ascii').str.strip())
+    return text.mask(missing, 'N/A').str[:width]
+
+
+def lead_table_rows(leads):
+    """Table rows for the leads, without the header."""
+    if leads.empty:
+        # No leads: clean_leads may hand over a frame without any columns
+        return []
+    columns = [leads['id'].astype(str)] + [clean_column(leads[field], width) for field, width in TABLE_FIELDS]
+    return [list(row) for row in zip(*columns)]
+
+
+def lead_tables(rows, rows_per_table=PDF_ROWS_PER_TABLE):
+    """
+    The leads table as a run of tables of rows_per_table rows each. Small
+    tables lay out in linear time where one large table does not; stacked
+    with the same column widths they read as one table. A falsy
+    rows_per_table gives a single table.
+    """
+    if not rows_per_table:
+        return [Table([TABLE_HEADERS] + rows, colWidths=TABLE_COL_WIDTHS, style=HEADER_TABLE_STYLE)]
+    tables = [Table([TABLE_HEADERS] + rows[:rows_per_table], colWidths=TABLE_COL_WIDTHS, style=HEADER_TABLE_STYLE)]
+    for start in range(rows_per_table, len(rows), rows_per_table):
+        tables.append(Table(rows[start:start + rows_per_table], colWidths=TABLE_COL_WIDTHS, style=BODY_TABLE_STYLE))
+    return tables
+
 
 class LeadReportPDF:
-    def __init__(self, df, package):
+    def __init__(self, df, package, rows_per_table=PDF_ROWS_PER_TABLE):
         self.package = package
+        self.rows_per_table = rows_per_table
         self.leads = df.head(PACKAGE_LEADS[package]) if package in PACKAGE_LEADS else df.head(50)
         self.features = PACKAGE_FEATURES.get(package, [])
 
     def _clean_text(self, text):
         """Clean text to handle Unicode characters for PDF generation."""
-        if not text or pd.isna(text):
-            return 'N/A'
-
-        # Convert to string if not already
-        text = str(text)
-
-        # Normalize Unicode characters
-        text = unicodedata.normalize('NFKD', text)
-
-        # Remove or replace problematic characters
-        # Replace common Unicode punctuation with ASCII equivalents
-        replacements = {
-            '\u2013': '-',  # en dash
-            '\u2014': '-',  # em dash
-            '\u2018': "'",  # left single quotation mark
-            '\u2019': "'",  # right single quotation mark
-            '\u201c': '"',  # left double quotation mark
-            '\u201d': '"',  # right double quotation mark
-            '\u2026': '...',  # horizontal ellipsis
-        }
-
-        for unicode_char, ascii_char in replacements.items():
-            text = text.replace(unicode_char, ascii_char)
-
-        # Remove any remaining non-ASCII characters
-        text = ''.join(char for char in text if ord(char) < 128)
-
-        return text.strip()
+        return clean_text(text)
 
     def generate(self, filename=None):
         if filename is None:
@@ -85,26 +136,7 @@ class LeadReportPDF:
         story.append(Paragraph("Leads Data", styles['Heading2']))
         story.append(Spacer(1, 6))
 
-        table_data = [['ID', 'Business Name', 'Phone', 'Address', 'Category']]
-        for _, row in self.leads.iterrows():
-            name = self._clean_text(row['name'])[:18]
-            phone = self._clean_text(row['phone'])[:12]
-            address = self._clean_text(row['address'])[:18]
-            category = self._clean_text(row['category'])[:10]
-            table_data.append([str(row['id']), name, phone, address, category])
-
-        table = Table(table_data, colWidths=[0.5*inch, 1.5*inch, 1*inch, 1.5*inch, 1*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ]))
-        story.append(table)
+        story.extend(lead_tables(lead_table_rows(self.leads), self.rows_per_table))
         story.append(Spacer(1, 12))
 
         # Analytics page for premium package
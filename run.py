@@ -1,44 +1,195 @@
-import schedule
+import argparse
+import hashlib
+import multiprocessing
+import sys
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import pandas as pd
 from scrapers.scraper import LeadScraper
 from cleaner.cleaner import LeadCleaner
+from pipeline import LeadPipeline
 from reports.generate_pdf import LeadReportPDF
-from reports.generate_excel import LeadReportExcel
-from config import NICHE_OPTIONS, PACKAGE_LEADS, SELECTED_NICHE, PRICES
+from reports.generate_excel import HEADERS as EXPORT_HEADERS, LeadReportExcel
+from reports.export_data import FORMATS as EXPORT_FORMATS, export_format, export_raw
+from store.lead_store import LeadStore, StoreSink
+from store.snapshots import snapshot_leads
+from scheduler import RefreshScheduler
+from config import (NICHE_OPTIONS, NICHE_SOURCES, PACKAGE_LEADS, SELECTED_NICHE, PRICES, PACKAGE_FRESHNESS_HOURS,
+                    REPORTS_DIR, EXPORTS_DIR, DAILY_UPDATE_CONCURRENCY, DAILY_UPDATE_DEADLINE_MINUTES,
+                    REPORT_TEMPLATE_VERSION, REPORT_WORKERS, REPORT_POOL_MIN_ROWS, PACKAGE_MAX_PAGES)
 import os
 
-def generate_lead_package(niche, package):
-    """Generate a lead package for given niche and package type."""
-    print(f"Generating {package} package for {niche}...")
+def refresh_niche(niche, store, target, max_age_hours=None, sources=None, scraper=None, resume=False):
+    """
+    Crawl a niche (only the named sources, if given) until there are target
+    clean leads, and save them to the lead store. Returns the number saved.
+    With resume, pages crawled within max_age_hours are replayed from the
+    crawl frontier rather than fetched again. Uses scraper if given, else a
+    scraper of its own that it closes.
+    """
+    owned = scraper is None
+    scraper = scraper or LeadScraper(max_age_hours=max_age_hours)
+    try:
+        pipeline = LeadPipeline(LeadCleaner())
+        saved = StoreSink(store, niche)
 
-    # Scrape leads
-    scraper = LeadScraper()
-    df = scraper.scrape_leads(niche)
-    print(f"Scraped {len(df)} raw leads.")
+        stream = scraper.iter_leads(niche, max_pages=PACKAGE_MAX_PAGES, max_age_hours=max_age_hours,
+                                    target_count=target, sources=sources, resume=resume)
+        try:
+            pipeline.run(stream, [saved], limit=target)
+        finally:
+            stream.close()
+        scraper.record_yield(pipeline.raw_counts, pipeline.kept_counts)
+    finally:
+        if owned:
+            scraper.close()
+    print(f"Scraped {sum(pipeline.raw_counts.values())} raw leads; saved {saved.written} clean leads.")
+    return saved.written
 
-    # Clean leads
-    cleaner = LeadCleaner()
-    df = cleaner.clean_leads(df)
-    print(f"Cleaned to {len(df)} leads.")
+def stale_sources(niche, scraper, max_age_hours, max_pages=PACKAGE_MAX_PAGES):
+    """
+    Names of the niche's sources whose first max_pages pages have not all
+    been crawled within max_age_hours, according to the crawl frontier. A
+    source that a smaller, target-limited crawl stopped part way through is
+    stale, as it may still hold leads.
+    """
+    pages = set(range(1, max_pages + 1))
+    return [source['name'] for source in NICHE_SOURCES.get(niche, [])
+            if not pages <= scraper.frontier.settled_pages(niche, source['name'], max_age_hours)]
+
+def ensure_fresh_leads(niche, store, target, max_age_hours, force_refresh=False, scraper=None):
+    """
+    Make sure the lead store holds target leads of the niche seen within
+    max_age_hours, crawling only the sources not yet crawled through within
+    that window to top it up. Pages already crawled are replayed from the
+    crawl frontier, so the crawl carries on where the last one stopped.
+    force_refresh crawls every source first. Uses scraper if given, else a
+    scraper of its own that it closes.
+    """
+    owned = scraper is None
+    scraper = scraper or LeadScraper(max_age_hours=max_age_hours)
+    try:
+        fresh = store.count(niche, max_age_hours)
+        if force_refresh:
+            print("Refreshing all sources...")
+            refresh_niche(niche, store, target, max_age_hours, scraper=scraper)
+        elif fresh < target:
+            sources = stale_sources(niche, scraper, max_age_hours)
+            if sources:
+                print(f"{fresh} fresh leads stored; scraping sources not fully crawled: {', '.join(sources)}")
+                # Replayed pages count towards the target, so aim for all of it
+                refresh_niche(niche, store, target, max_age_hours, sources, scraper=scraper, resume=True)
+            else:
+                print(f"Only {fresh} fresh leads stored, and every source was crawled through.")
+        else:
+            print(f"Serving {target} of {fresh} fresh leads from the lead store.")
+    finally:
+        if owned:
+            scraper.close()
+
+def package_leads(store, niche, package):
+    """The package's top leads of the niche within its freshness window."""
+    return store.to_frame(niche, PACKAGE_FRESHNESS_HOURS.get(package), limit=PACKAGE_LEADS.get(package, 50))
+
+# Lead fields that appear in reports; only these decide whether a report can be reused
+REPORT_FIELDS = ['id', 'name', 'phone', 'address', 'category', 'score']
+
+def report_key(df, package):
+    """Hash of the package, its report rows and REPORT_TEMPLATE_VERSION, naming the package's files."""
+    leads = df.head(PACKAGE_LEADS.get(package, 50))
+    fields = [field for field in REPORT_FIELDS if field in leads]
+    digest = hashlib.sha256(f"{package}|{REPORT_TEMPLATE_VERSION}|{','.join(fields)}".encode())
+    digest.update(pd.util.hash_pandas_object(leads[fields], index=False).values.tobytes())
+    return digest.hexdigest()[:16]
+
+def render_report(kind, df, package, filename):
+    """
+    Write one report ('pdf' or 'excel') to filename. It is written under a
+    temporary name first, so a file at filename is always complete.
+    """
+    root, ext = os.path.splitext(filename)
+    partial = f"{root}.{os.getpid()}.partial{ext}"
+    generator = (LeadReportPDF if kind == 'pdf' else LeadReportExcel)(df, package)
+    try:
+        generator.generate(partial)
+        os.replace(partial, filename)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return filename
 
+def report_pool(rows):
+    """Worker processes for rendering reports of rows leads in all, or None when they should render inline."""
+    if not REPORT_WORKERS or rows < REPORT_POOL_MIN_ROWS:
+        return None
+    return ProcessPoolExecutor(max_workers=REPORT_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+
+def build_package_files(df, package, niche=None, pool=None):
+    """
+    Write the package's reports for df, or reuse them if these leads were
+    already reported: files are named by report_key. With niche, file names
+    start with the niche so packages of several niches do not overwrite each
+    other. With a process pool, the reports render side by side.
+    Returns the files generated.
+    """
     # Ensure directories exist
     os.makedirs('reports', exist_ok=True)
     os.makedirs('exports', exist_ok=True)
 
-    files_generated = []
-
-    # Generate reports based on package
+    key = report_key(df, package)
+    prefix = f"{niche}_" if niche else ''
+    reports = []
     if package in ['basic', 'standard', 'premium']:
         # All packages get PDF
-        pdf_gen = LeadReportPDF(df, package)
-        pdf_file = pdf_gen.generate()
-        files_generated.append(f"PDF: {pdf_file}")
-
+        reports.append(('PDF', 'pdf', f"{REPORTS_DIR}{prefix}{package}_{key}.pdf"))
     if package in ['standard', 'premium']:
         # Standard and premium get Excel
-        excel_gen = LeadReportExcel(df, package)
-        excel_file = excel_gen.generate()
-        files_generated.append(f"Excel: {excel_file}")
+        reports.append(('Excel', 'excel', f"{EXPORTS_DIR}{prefix}{package}_leads_{key}.xlsx"))
+
+    todo = [(kind, filename) for _, kind, filename in reports if not os.path.exists(filename)]
+    if len(todo) < len(reports):
+        print(f"Reusing {len(reports) - len(todo)} report(s) already built for these leads.")
+    if pool is not None and todo:
+        try:
+            futures = [pool.submit(render_report, kind, df, package, filename) for kind, filename in todo]
+            for future in futures:
+                future.result()
+            todo = []
+        except (BrokenProcessPool, OSError) as e:
+            print(f"Report workers unavailable ({e}); rendering inline.")
+            todo = [(kind, filename) for kind, filename in todo if not os.path.exists(filename)]
+    for kind, filename in todo:
+        render_report(kind, df, package, filename)
+
+    return [f"{label}: {filename}" for label, _, filename in reports]
+
+def generate_lead_package(niche, package, force_refresh=False):
+    """
+    Generate a lead package for given niche and package type.
+
+    Leads come from the lead store when enough were seen within the package's
+    freshness window; otherwise only the sources with stale data are crawled
+    to top it up. force_refresh crawls every source first.
+    """
+    print(f"Generating {package} package for {niche}...")
+
+    store = LeadStore()
+    try:
+        ensure_fresh_leads(niche, store, PACKAGE_LEADS.get(package, 50), PACKAGE_FRESHNESS_HOURS.get(package),
+                           force_refresh)
+        df = package_leads(store, niche, package)
+    finally:
+        store.close()
+    print(f"Cleaned to {len(df)} leads.")
+
+    # A basic package has just a PDF, nothing to render side by side
+    pool = report_pool(len(df)) if package != 'basic' else None
+    try:
+        files_generated = build_package_files(df, package, pool=pool)
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True)
 
     print(f"\n{package.capitalize()} package generated!")
     print("Files:")
@@ -48,20 +199,178 @@ def generate_lead_package(niche, package):
 
     return files_generated
 
-def automated_daily_update():
-    """Automated daily lead refresh for all niches."""
+def generate_batch(niches, packages, force_refresh=False, workers=None):
+    """
+    Build every package for every niche. Each niche is crawled and cleaned
+    once, for the largest package and the tightest freshness window asked
+    for; its packages are nested top-N slices of the stored leads, written
+    in parallel while the next niche is crawled.
+
+    Returns a list of (niche, package, error) for everything that failed.
+    """
+    target = max(PACKAGE_LEADS.get(package, 50) for package in packages)
+    max_age_hours = min(PACKAGE_FRESHNESS_HOURS.get(package, 72) for package in packages)
+    failures = []
+    builds = {}
+    store = LeadStore()
+    # One scraper for every niche, so they share its page cache, crawl frontier and HTTP session
+    scraper = LeadScraper(max_age_hours=max_age_hours)
+    pool = ThreadPoolExecutor(max_workers=workers or len(packages))
+    renderers = report_pool(target * len(niches) * len(packages))
+    try:
+        for niche in niches:
+            print(f"\nPreparing {niche} for {', '.join(packages)}...")
+            try:
+                ensure_fresh_leads(niche, store, target, max_age_hours, force_refresh, scraper)
+                frames = {package: package_leads(store, niche, package) for package in packages}
+            except Exception as e:
+                print(f"Failed to refresh {niche}: {e}")
+                failures.extend((niche, package, e) for package in packages)
+                continue
+            for package, df in frames.items():
+                builds[pool.submit(build_package_files, df, package, niche, renderers)] = (niche, package, len(df))
+
+        for future in as_completed(builds):
+            niche, package, count = builds[future]
+            try:
+                files = future.result()
+            except Exception as e:
+                print(f"Failed to build {package} package for {niche}: {e}")
+                failures.append((niche, package, e))
+                continue
+            print(f"{niche} {package}: {count} leads -> {', '.join(files)}")
+    finally:
+        pool.shutdown(wait=True)
+        if renderers is not None:
+            renderers.shutdown(wait=True)
+        scraper.close()
+        store.close()
+    return failures
+
+def refresh_for_daily_update(niche, scraper, cleaner, store, deadline):
+    """Crawl, clean and store one niche for the daily update. Returns its summary row."""
+    start = time.monotonic()
+    # Limited pages for daily update; pages already crawled today (e.g. before a crash) are replayed
+    df = scraper.scrape_leads(niche, max_pages=2, resume=True, deadline=deadline)
+    raw = len(df)
+    df = cleaner.clean_leads(df)
+    saved = store.upsert(df.to_dict('records'), niche=niche)
+    snapshot_leads(df, niche)
+    return {
+        'niche': niche,
+        'seconds': time.monotonic() - start,
+        'raw': raw,
+        'clean': len(df),
+        'saved': saved,
+        'status': 'deadline' if time.monotonic() >= deadline else 'ok',
+    }
+
+def automated_daily_update(niches=None, deadline_minutes=DAILY_UPDATE_DEADLINE_MINUTES):
+    """
+    Automated daily lead refresh for all niches, saved to the lead store.
+
+    Niches are crawled concurrently (DAILY_UPDATE_CONCURRENCY at once) by one
+    shared scraper, so they share its page cache, connection pool and per-host
+    throttle. Crawling stops at the deadline; whatever was found is saved and
+    the rest is resumed next run. Returns a summary row per niche.
+    """
     print("Running automated daily lead update...")
-    for niche in NICHE_OPTIONS.keys():
-        print(f"Updating leads for {niche}...")
-        scraper = LeadScraper()
-        df = scraper.scrape_leads(niche, max_pages=2)  # Limited pages for daily update
-        cleaner = LeadCleaner()
-        df = cleaner.clean_leads(df)
-        # Save to cache or database (for now, just print)
-        print(f"Updated {len(df)} leads for {niche}")
+    niches = list(niches or NICHE_OPTIONS.keys())
+    deadline = time.monotonic() + deadline_minutes * 60
+    scraper = LeadScraper(max_age_hours=min(PACKAGE_FRESHNESS_HOURS.values()))
+    cleaner = LeadCleaner()
+    store = LeadStore()
+    summary = []
+    pool = ThreadPoolExecutor(max_workers=max(1, min(DAILY_UPDATE_CONCURRENCY, len(niches))))
+    try:
+        futures = {pool.submit(refresh_for_daily_update, niche, scraper, cleaner, store, deadline): niche
+                   for niche in niches}
+        for future in as_completed(futures):
+            try:
+                summary.append(future.result())
+            except Exception as e:
+                print(f"Failed to update {futures[future]}: {e}")
+                summary.append({'niche': futures[future], 'seconds': 0, 'raw': 0, 'clean': 0, 'saved': 0,
+                                'status': f'failed: {e}'})
+    finally:
+        pool.shutdown(wait=True)
+        store.close()
+        scraper.close()
+
+    summary.sort(key=lambda row: niches.index(row['niche']))
+    print(f"\n{'niche':<28} {'seconds':>8} {'raw':>6} {'clean':>6} {'yield':>6} {'stored':>7}  status")
+    for row in summary:
+        ratio = f"{row['clean'] / row['raw']:.0%}" if row['raw'] else '-'
+        print(f"{row['niche']:<28} {row['seconds']:>8.1f} {row['raw']:>6} {row['clean']:>6} {ratio:>6} "
+              f"{row['saved']:>7}  {row['status']}")
     print("Daily update complete.")
+    return summary
+
+def main(argv=None):
+    """
+    Interactive tool; the batch command builds packages unattended, the
+    daily command refreshes every niche once and the export command writes
+    stored leads as raw data. Returns the exit status.
+    """
+    parser = argparse.ArgumentParser(description='Generate lead packages or run daily lead updates.')
+    parser.add_argument('--force-refresh', action='store_true',
+                        help='crawl every source instead of serving fresh leads from the lead store')
+    commands = parser.add_subparsers(dest='command')
+    batch = commands.add_parser('batch', help='build packages for several niches without prompting')
+    batch.add_argument('--niches', nargs='+', choices=list(NICHE_OPTIONS), default=list(NICHE_OPTIONS),
+                       help='niches to build (default: all)')
+    batch.add_argument('--packages', nargs='+', choices=list(PACKAGE_LEADS), default=list(PACKAGE_LEADS),
+                       help='packages to build for each niche (default: all)')
+    batch.add_argument('--workers', type=int, default=None, help='packages written at once (default: one per package)')
+    batch.add_argument('--force-refresh', action='store_true', default=argparse.SUPPRESS,
+                       help='crawl every source of each niche first')
+    daily = commands.add_parser('daily', help='refresh the lead store for several niches once (e.g. from cron)')
+    daily.add_argument('--niches', nargs='+', choices=list(NICHE_OPTIONS), default=list(NICHE_OPTIONS),
+                       help='niches to refresh (default: all)')
+    daily.add_argument('--deadline-minutes', type=float, default=DAILY_UPDATE_DEADLINE_MINUTES,
+                       help=f'stop crawling after this long (default: {DAILY_UPDATE_DEADLINE_MINUTES})')
+    export = commands.add_parser('export', help='export stored leads as CSV or gzipped JSON lines')
+    export.add_argument('--niche', choices=list(NICHE_OPTIONS), default=None, help='niche to export (default: all)')
+    export.add_argument('--format', choices=list(EXPORT_FORMATS), default=None,
+                        help="file format (default: the --output file's, else csv)")
+    export.add_argument('--columns', nargs='+', choices=EXPORT_HEADERS, default=None,
+                        help='columns to include, by Excel header (default: all)')
+    export.add_argument('--max-age-hours', type=float, default=None, help='only leads seen this recently')
+    export.add_argument('--output', default=None,
+                        help=f"file to write, ending in {' or '.join(EXPORT_FORMATS.values())} (default: under exports/)")
+    args = parser.parse_args([] if argv is None else argv)
+
+    if args.command == 'export' and args.output is not None:
+        try:
+            output_format = export_format(args.output)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.format not in (None, output_format):
+            parser.error(f"--output {args.output} is not a {args.format} file: "
+                         f"expected it to end in {EXPORT_FORMATS[args.format]}")
+
+    if args.command == 'export':
+        store = LeadStore()
+        try:
+            export_raw(store, args.output, args.format, args.niche, args.max_age_hours, columns=args.columns)
+        finally:
+            store.close()
+        return 0
+
+    if args.command == 'daily':
+        summary = automated_daily_update(args.niches, args.deadline_minutes)
+        return 1 if any(row['status'].startswith('failed') for row in summary) else 0
+
+    if args.command == 'batch':
+        failures = generate_batch(args.niches, args.packages, args.force_refresh, args.workers)
+        if failures:
+            print(f"\n{len(failures)} package(s) failed:")
+            for niche, package, error in failures:
+                print(f"- {niche} {package}: {error}")
+            return 1
+        print("\nAll packages generated.")
+        return 0
 
-def main():
     print("Lead Generation Automation Tool")
     print("Choose mode:")
     print("1. Generate single package")
@@ -69,13 +378,16 @@ def main():
     mode = input("Enter mode (1 or 2, default 1): ").strip() or '1'
 
     if mode == '2':
-        # Automated mode
-        print("Starting automated daily updates...")
-        schedule.every().day.at("06:00").do(automated_daily_update)
-        print("Scheduled daily updates at 06:00. Press Ctrl+C to stop.")
-        while True:
-            schedule.run_pending()
-            time.sleep(60)
+        # Automated mode: refresh each source just before its leads go stale
+        print("Starting automated updates. Press Ctrl+C to stop.")
+        scheduler = RefreshScheduler()
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            print("\nStopping automated updates.")
+        finally:
+            scheduler.close()
+        return 0
     else:
         # Single package mode
         print("Choose niche:")
@@ -94,8 +406,9 @@ def main():
             print("Invalid package, using basic")
             package = 'basic'
 
-        generate_lead_package(niche, package)
+        generate_lead_package(niche, package, force_refresh=args.force_refresh)
+        return 0
         
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main(sys.argv[1:]))
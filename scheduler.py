@@ -0,0 +1,130 @@
+"""
+Freshness-driven refresh scheduling.
+
+Every (niche, source) pair is a refresh task, due REFRESH_MARGIN_HOURS
+before the source's newest stored leads would be older than the niche's
+tightest package freshness window. Tasks wait in a heap ordered by due time,
+then by the source's historical yield. The scheduler runs due tasks while
+the hourly crawl budget allows and then sleeps until the next one is due.
+"""
+
+import heapq
+import threading
+import time
+from collections import deque
+from cleaner.cleaner import LeadCleaner
+from config import (NICHE_OPTIONS, NICHE_SOURCES, PACKAGE_FRESHNESS_HOURS, REFRESH_MARGIN_HOURS, SCHEDULE_PACKAGES,
+                    SCHEDULER_PAGES_PER_HOUR, SCHEDULER_PAGES_PER_TASK, SCHEDULER_RETRY_MINUTES)
+from scrapers.scraper import LeadScraper
+from store.lead_store import LeadStore
+from store.snapshots import snapshot_leads
+
+
+def niche_sla_hours(niche):
+    """Freshness window of the most demanding package sold for a niche."""
+    packages = SCHEDULE_PACKAGES.get(niche) or list(PACKAGE_FRESHNESS_HOURS)
+    return min(PACKAGE_FRESHNESS_HOURS[package] for package in packages)
+
+
+class RefreshScheduler:
+    """Keeps every (niche, source) in the lead store within its freshness SLA."""
+
+    def __init__(self, niches=None, scraper=None, store=None, cleaner=None,
+                 pages_per_task=SCHEDULER_PAGES_PER_TASK, pages_per_hour=SCHEDULER_PAGES_PER_HOUR,
+                 margin_hours=REFRESH_MARGIN_HOURS):
+        self.niches = list(niches or NICHE_OPTIONS)
+        # Pages cached for less than the margin are reused; older ones are revalidated
+        self.scraper = scraper or LeadScraper(max_age_hours=margin_hours)
+        self.store = store or LeadStore()
+        self.cleaner = cleaner or LeadCleaner()
+        self.pages_per_task = pages_per_task
+        self.pages_per_hour = pages_per_hour
+        self.margin_hours = margin_hours
+        self.clock = time.time
+        self._heap = []  # (due_at, -yield, niche, source)
+        self._attempted = {}  # (niche, source) -> when it was last refreshed
+        self._spent = deque()  # (time, pages) budgeted in the last hour
+        self._stop = threading.Event()
+        self.plan()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def due_at(self, niche, source, last_seen=None):
+        """When a source must be refreshed: the SLA less the margin after its newest lead or last refresh."""
+        refreshed = max(last_seen or 0, self._attempted.get((niche, source), 0))
+        return refreshed + (niche_sla_hours(niche) - self.margin_hours) * 3600
+
+    def _push(self, niche, source, due_at):
+        heapq.heappush(self._heap, (due_at, -self.scraper.yield_stats.yield_ratio(source), niche, source))
+
+    def plan(self):
+        """Rebuild the queue from the lead store's newest lead per source."""
+        self._heap = []
+        for niche in self.niches:
+            last_seen = self.store.source_freshness(niche)
+            for source in NICHE_SOURCES.get(niche, []):
+                self._push(niche, source['name'], self.due_at(niche, source['name'], last_seen.get(source['name'])))
+
+    def budget_left(self, now):
+        """Pages that may still be crawled in the hour up to now."""
+        while self._spent and self._spent[0][0] <= now - 3600:
+            self._spent.popleft()
+        return self.pages_per_hour - sum(pages for _, pages in self._spent)
+
+    def next_due(self):
+        return self._heap[0][0] if self._heap else None
+
+    def run_pending(self):
+        """
+        Run the tasks that are due, most urgent first, while the crawl budget
+        allows. Returns when the scheduler should next wake, or None if
+        there is nothing to do.
+        """
+        while self._heap and self._heap[0][0] <= self.clock():
+            now = self.clock()
+            if self.budget_left(now) < self.pages_per_task:
+                # Budget spent: wake when the oldest spend leaves the hour
+                return self._spent[0][0] + 3600
+            _, _, niche, source = heapq.heappop(self._heap)
+            self.refresh(niche, source)
+        return self.next_due()
+
+    def refresh(self, niche, source):
+        """Crawl one source of a niche into the lead store and queue its next refresh."""
+        started = self.clock()
+        self._attempted[(niche, source)] = started
+        self._spent.append((started, self.pages_per_task))
+        print(f"Refreshing {source} for {niche}...")
+        try:
+            # Pages crawled within the margin (e.g. before a failed attempt) are replayed, not fetched again
+            df = self.scraper.scrape_leads(niche, max_pages=self.pages_per_task, sources=[source], resume=True)
+            raw = len(df)
+            df = self.cleaner.clean_leads(df)
+            self.scraper.record_yield({source: raw}, {source: len(df)})
+            saved = self.store.upsert(df.to_dict('records'), niche=niche)
+            snapshot_leads(df, niche)
+        except Exception as e:
+            print(f"Refresh of {source} for {niche} failed: {e}")
+            self._push(niche, source, started + SCHEDULER_RETRY_MINUTES * 60)
+            return
+        print(f"Saved {saved} leads from {source} for {niche}")
+        self._push(niche, source, self.due_at(niche, source, self.store.source_freshness(niche).get(source)))
+
+    def run_forever(self):
+        """Run tasks as they fall due, sleeping in between, until stop() is called."""
+        while not self._stop.is_set():
+            wake = self.run_pending()
+            if wake is None:
+                print("Nothing to refresh.")
+                self._stop.wait()
+                continue
+            print(f"Next refresh at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(wake))}")
+            self._stop.wait(max(0, wake - self.clock()))
+
+    def stop(self):
+        self._stop.set()
+
+    def close(self):
+        self.store.close()
+        self.scraper.close()
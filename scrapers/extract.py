@@ -0,0 +1,109 @@
+import re
+
+# Listing text containing any of these is footer/navigation content, not a business
+SKIP_KEYWORDS = ['premium user', 'view details', 'operating:', 'open now', 'closed now',
+                 'previous next', 'the new yep!', '© yep!', 'waterproofing professionals',
+                 'home services', 'building contractors']
+
+# Cities that mark a comma-separated segment as an address
+ADDRESS_CITIES = ['cape town', 'johannesburg', 'durban', 'pretoria', 'port elizabeth',
+                  'bloemfontein', 'east london', 'kimberley']
+
+# Phone formats in priority order: the first format found anywhere in the text wins
+PHONE_FORMATS = [
+    r'\b\d{3}[-.\s]\d{3}[-.\s]\d{4}\b',  # 123-456-7890
+    r'\b\d{10}\b',                        # 1234567890
+    r'\+\d{2}[-.\s]\d{1}[-.\s]\d{3}[-.\s]\d{3}[-.\s]\d{3}\b',  # +27 1 234 567 890
+    r'\d{2}[-.\s]\d{3}[-.\s]\d{4}',      # 27 123 4567 (South African)
+]
+
+# Each keyword list is one alternation, so a single scan finds any of them
+SKIP_PATTERN = re.compile('|'.join(re.escape(keyword.lower()) for keyword in SKIP_KEYWORDS))
+CITY_PATTERN = re.compile('|'.join(re.escape(city) for city in ADDRESS_CITIES))
+PHONE_PATTERNS = [re.compile(phone_format) for phone_format in PHONE_FORMATS]
+PHONE_PATTERN = re.compile('|'.join(f'({phone_format})' for phone_format in PHONE_FORMATS))
+HAS_DIGIT = re.compile(r'\d')
+POSTAL_CODE = re.compile(r'\d{4}')
+NAME_PREFIX = re.compile(r'^(premium user|[A-Z])')
+WHITESPACE = re.compile(r'\s+')
+
+
+def find_phone(text):
+    """
+    First phone number in text, preferring earlier PHONE_FORMATS over earlier
+    positions, or None.
+    """
+    match = PHONE_PATTERN.search(text)
+    if match is None:
+        return None
+    # Nothing matched before match.start(), and at that position the
+    # alternation already tried the higher-priority formats, so those can only
+    # match further on. Usually the winner is the first format and we are done.
+    for pattern in PHONE_PATTERNS[:match.lastindex - 1]:
+        earlier_format = pattern.search(text, match.start() + 1)
+        if earlier_format:
+            return earlier_format.group()
+    return match.group()
+
+
+def extract_lead_text(full_text, niche):
+    """
+    Extract a lead dict from the text of one listing, or None if the listing
+    is not a business. Lowercases the text once and uses precompiled patterns.
+    """
+    lower_text = full_text.lower()
+
+    # Skip if this looks like footer/navigation content
+    if SKIP_PATTERN.search(lower_text):
+        return None
+
+    name = None
+    address = None
+
+    # Pattern 1: Name followed by address
+    lines = full_text.split(',')
+    if len(lines) >= 2:
+        # First part might be name
+        potential_name = lines[0].strip()
+        if len(potential_name) > 3 and not potential_name.isdigit():
+            name = potential_name
+
+        # An address segment has numbers and a known city, or a postal code
+        for line, lower_line in zip(lines, lower_text.split(',')):
+            line = line.strip()
+            if (HAS_DIGIT.search(line) and CITY_PATTERN.search(lower_line)) or POSTAL_CODE.search(line):
+                address = line
+                break
+
+    # If no structured extraction, take the first words that look like a business name
+    if not name:
+        parts = NAME_PREFIX.sub('', full_text).strip().split()
+        name_parts = []
+        for part in parts[:5]:
+            if len(part) > 2 and not part.isdigit():
+                name_parts.append(part)
+            else:
+                break
+        name = ' '.join(name_parts) if name_parts else None
+
+    phone = find_phone(full_text)
+
+    if name:
+        name = WHITESPACE.sub(' ', name).strip()
+        if len(name) < 3 or name.isdigit():
+            name = None
+
+    if address:
+        address = WHITESPACE.sub(' ', address).strip()
+
+    # Only return if we have at least a name
+    if name:
+        return {
+            'name': name,
+            'phone': phone or 'N/A',
+            'address': address or 'N/A',
+            'category': niche,
+            'niche': niche
+        }
+
+    return None
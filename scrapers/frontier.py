@@ -0,0 +1,119 @@
+import json
+import threading
+import time
+from config import FRONTIER_CHECKPOINT_PAGES, ROBOTS_NEGATIVE_TTL_HOURS
+
+# Page states recorded in the frontier
+DONE = 'done'  # Fetched and parsed; its leads are stored with it
+FAILED = 'failed'  # Error or non-200 response; retried on resume
+BLOCKED = 'blocked'  # Disallowed by robots.txt
+
+
+class CrawlFrontier:
+    """
+    Per-page crawl progress: source, page number, status and the page's
+    leads, keyed by URL. A resumed crawl replays pages already done instead
+    of fetching and parsing them again, and retries the rest. A done page's
+    updated_at is when its body was fetched, which may predate the parse
+    when the body came from the page cache.
+
+    Stored in a 'crawl_frontier' table of the page cache connection and
+    committed every checkpoint_every pages, so at most that many pages are
+    redone after a crash.
+    """
+
+    def __init__(self, conn=None, lock=None, checkpoint_every=FRONTIER_CHECKPOINT_PAGES):
+        self.conn = conn
+        self.lock = lock or threading.RLock()
+        self.checkpoint_every = max(1, checkpoint_every)
+        self._pending = 0
+        self._memory = {}  # url -> row when no connection is given
+        if conn is not None:
+            with self.lock:
+                self.conn.execute('''
+                    CREATE TABLE IF NOT EXISTS crawl_frontier (
+                        url TEXT PRIMARY KEY,
+                        niche TEXT NOT NULL,
+                        source TEXT NOT NULL,
+                        page INTEGER NOT NULL,
+                        status TEXT NOT NULL,
+                        lead_count INTEGER NOT NULL DEFAULT 0,
+                        leads TEXT,
+                        error TEXT,
+                        updated_at REAL NOT NULL
+                    )
+                ''')
+                self.conn.execute('CREATE INDEX IF NOT EXISTS idx_frontier_niche ON crawl_frontier (niche, source)')
+                self.conn.commit()
+
+    def record(self, url, niche, source, page, status, leads=None, error=None, fetched_at=None):
+        """Record the outcome of crawling one page, fetched at fetched_at (default: now)."""
+        leads = leads or []
+        row = (url, niche, source, page, status, len(leads), json.dumps(leads) if status == DONE else None,
+               error, time.time() if fetched_at is None else fetched_at)
+        if self.conn is None:
+            self._memory[url] = row
+            return
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO crawl_frontier '
+                              '(url, niche, source, page, status, lead_count, leads, error, updated_at) '
+                              'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', row)
+            self._pending += 1
+            if self._pending >= self.checkpoint_every:
+                self.checkpoint()
+
+    def checkpoint(self):
+        """Commit recorded pages now."""
+        if self.conn is None:
+            return
+        with self.lock:
+            self.conn.commit()
+            self._pending = 0
+
+    def done_leads(self, url, max_age_hours=None):
+        """
+        Leads of a page fetched and parsed within max_age_hours, each with
+        the fetch time as seen_at, or None if the page still needs crawling.
+        """
+        if self.conn is None:
+            row = self._memory.get(url)
+            row = row and (row[4], row[6], row[8])
+        else:
+            with self.lock:
+                row = self.conn.execute('SELECT status, leads, updated_at FROM crawl_frontier WHERE url = ?',
+                                        (url,)).fetchone()
+        if row is None or row[0] != DONE:
+            return None
+        if max_age_hours is not None and time.time() - row[2] > max_age_hours * 3600:
+            return None
+        return [dict(lead, seen_at=row[2]) for lead in json.loads(row[1])]
+
+    def settled_pages(self, niche, source, max_age_hours=None, blocked_hours=ROBOTS_NEGATIVE_TTL_HOURS):
+        """
+        Page numbers of a source crawled to a final outcome within
+        max_age_hours: done, or blocked by robots.txt within blocked_hours.
+        A block may come from a robots.txt server error, which is only
+        trusted for the robots cache's negative TTL. Failed pages are left
+        out, as they are worth retrying.
+        """
+        now = time.time()
+        cutoff = now - max_age_hours * 3600 if max_age_hours is not None else 0
+        blocked_cutoff = max(cutoff, now - blocked_hours * 3600)
+        if self.conn is None:
+            return {row[3] for row in self._memory.values()
+                    if row[1] == niche and row[2] == source and
+                    row[8] >= (cutoff if row[4] == DONE else blocked_cutoff) and row[4] in (DONE, BLOCKED)}
+        with self.lock:
+            return {row[0] for row in self.conn.execute(
+                'SELECT page FROM crawl_frontier WHERE niche = ? AND source = ? AND '
+                '((status = ? AND updated_at >= ?) OR (status = ? AND updated_at >= ?))',
+                (niche, source, DONE, cutoff, BLOCKED, blocked_cutoff))}
+
+    def progress(self, niche):
+        """Pages recorded for a niche by status, e.g. {'done': 12, 'failed': 1}."""
+        if self.conn is None:
+            statuses = [row[4] for row in self._memory.values() if row[1] == niche]
+            return {status: statuses.count(status) for status in set(statuses)}
+        with self.lock:
+            return dict(self.conn.execute('SELECT status, COUNT(*) FROM crawl_frontier WHERE niche = ? '
+                                          'GROUP BY status', (niche,)).fetchall())
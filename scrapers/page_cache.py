@@ -0,0 +1,217 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from config import CACHE_COMMIT_EVERY, CACHE_COMPRESSION_LEVEL, CACHE_MAX_BYTES, PACKAGE_FRESHNESS_HOURS
+
+
+class PageCache:
+    """
+    On-disk page cache backed by SQLite.
+
+    Each fetch is one compressed row keyed by URL, so a write costs the same
+    no matter how large the cache grows, and bodies are only read on lookup.
+    Rows carry their fetch time for freshness checks and their last access
+    time for LRU eviction, plus the ETag/Last-Modified validators needed to
+    revalidate a stale page with a conditional GET. The connection may be shared between threads;
+    every use of it goes through self.lock.
+    """
+
+    def __init__(self, path, commit_every=CACHE_COMMIT_EVERY, max_bytes=CACHE_MAX_BYTES):
+        self.path = path
+        self.commit_every = max(1, commit_every)
+        self.max_bytes = max_bytes
+        self._pending = 0
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                fetched_at REAL NOT NULL DEFAULT 0,
+                accessed_at REAL NOT NULL DEFAULT 0,
+                size INTEGER NOT NULL DEFAULT 0,
+                etag TEXT,
+                last_modified TEXT
+            )
+        ''')
+        self._migrate()
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_pages_accessed ON pages (accessed_at)')
+        self.conn.commit()
+
+    def _migrate(self):
+        """Add columns missing from caches created by older versions."""
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(pages)')}
+        for column, ddl in [('fetched_at', 'REAL NOT NULL DEFAULT 0'),
+                            ('accessed_at', 'REAL NOT NULL DEFAULT 0'),
+                            ('size', 'INTEGER NOT NULL DEFAULT 0'),
+                            ('etag', 'TEXT'),
+                            ('last_modified', 'TEXT')]:
+            if column not in columns:
+                self.conn.execute(f'ALTER TABLE pages ADD COLUMN {column} {ddl}')
+        if 'size' not in columns:
+            self.conn.execute('UPDATE pages SET size = length(body)')
+
+    def __contains__(self, url):
+        with self.lock:
+            row = self.conn.execute('SELECT 1 FROM pages WHERE url = ?', (url,)).fetchone()
+        return row is not None
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+
+    def get(self, url, max_age_hours=None):
+        """Return the cached page text for url, or None if missing or older than max_age_hours."""
+        entry = self.get_entry(url)
+        if entry is None or not self.is_fresh(entry, max_age_hours):
+            return None
+        return entry['text']
+
+    def get_entry(self, url):
+        """
+        Return the cached entry for url, fresh or not, as a dict with text,
+        fetched_at, etag and last_modified; or None if the URL is not cached.
+        """
+        with self.lock:
+            row = self.conn.execute('SELECT body, fetched_at, etag, last_modified FROM pages WHERE url = ?',
+                                    (url,)).fetchone()
+            if row is None:
+                return None
+            self.conn.execute('UPDATE pages SET accessed_at = ? WHERE url = ?', (time.time(), url))
+            self._mark_pending()
+        return {
+            'text': zlib.decompress(row[0]).decode('utf-8'),
+            'fetched_at': row[1],
+            'etag': row[2],
+            'last_modified': row[3]
+        }
+
+    @staticmethod
+    def is_fresh(entry, max_age_hours):
+        return max_age_hours is None or time.time() - entry['fetched_at'] <= max_age_hours * 3600
+
+    def put(self, url, text, fetched_at=None, etag=None, last_modified=None):
+        """Store a page; committed in batches of commit_every writes."""
+        body = zlib.compress(text.encode('utf-8'), CACHE_COMPRESSION_LEVEL)
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO pages (url, body, fetched_at, accessed_at, size, etag, last_modified) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (url, body, fetched_at or now, now, len(body), etag, last_modified)
+            )
+            self._mark_pending()
+
+    def touch(self, url, etag=None, last_modified=None):
+        """Mark a revalidated page as freshly fetched without rewriting its body."""
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                'UPDATE pages SET fetched_at = ?, accessed_at = ?, '
+                'etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE url = ?',
+                (now, now, etag, last_modified, url)
+            )
+            self._mark_pending()
+
+    def _mark_pending(self):
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.flush()
+
+    def flush(self):
+        """Commit any pending writes."""
+        with self.lock:
+            if self._pending:
+                self.conn.commit()
+                self._pending = 0
+
+    def size_bytes(self):
+        """Total compressed size of all cached bodies."""
+        with self.lock:
+            return self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM pages').fetchone()[0]
+
+    def evict(self, max_bytes=None):
+        """Drop least recently used pages until the cache fits in max_bytes. Returns pages removed."""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        with self.lock:
+            excess = self.size_bytes() - max_bytes
+            if excess <= 0:
+                return 0
+            victims = []
+            for url, size in self.conn.execute('SELECT url, size FROM pages ORDER BY accessed_at'):
+                victims.append((url,))
+                excess -= size
+                if excess <= 0:
+                    break
+            self.conn.executemany('DELETE FROM pages WHERE url = ?', victims)
+            self.conn.commit()
+            self._pending = 0
+        return len(victims)
+
+    def expire(self, max_age_hours):
+        """Drop pages fetched more than max_age_hours ago. Returns pages removed."""
+        cutoff = time.time() - max_age_hours * 3600
+        with self.lock:
+            removed = self.conn.execute('DELETE FROM pages WHERE fetched_at < ?', (cutoff,)).rowcount
+            self.conn.commit()
+            self._pending = 0
+        return removed
+
+    def compact(self, max_age_hours=None, max_bytes=None):
+        """
+        Expire pages too old for any package, evict down to the byte budget
+        and reclaim the freed space on disk.
+        """
+        if max_age_hours is None:
+            max_age_hours = max(PACKAGE_FRESHNESS_HOURS.values())
+        expired = self.expire(max_age_hours)
+        evicted = self.evict(max_bytes)
+        with self.lock:
+            self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            self.conn.execute('VACUUM')
+        return {'expired': expired, 'evicted': evicted, 'pages': len(self), 'bytes': self.size_bytes()}
+
+    def close(self):
+        with self.lock:
+            self.flush()
+            self.conn.close()
+
+    def import_json(self, json_path):
+        """Import a legacy {url: text} JSON cache. Returns the number of pages imported."""
+        with open(json_path, 'r') as f:
+            pages = json.load(f)
+        # Legacy entries have no fetch time, so they only satisfy callers without a max age
+        for url, text in pages.items():
+            self.put(url, text, fetched_at=1)
+        self.flush()
+        return len(pages)
+
+
+if __name__ == '__main__':
+    import argparse
+    from config import CACHE_FILE
+
+    parser = argparse.ArgumentParser(description='Inspect or compact the scraper page cache.')
+    parser.add_argument('command', nargs='?', choices=['stats', 'compact'], default='stats')
+    parser.add_argument('--max-age-hours', type=float, default=None,
+                        help='expire pages older than this (default: loosest package freshness)')
+    parser.add_argument('--max-bytes', type=int, default=None,
+                        help=f'byte budget for LRU eviction (default: {CACHE_MAX_BYTES})')
+    args = parser.parse_args()
+
+    if not os.path.exists(CACHE_FILE):
+        print(f"No cache at {CACHE_FILE}")
+    else:
+        cache = PageCache(CACHE_FILE)
+        if args.command == 'compact':
+            result = cache.compact(args.max_age_hours, args.max_bytes)
+            print(f"Expired {result['expired']} and evicted {result['evicted']} pages; "
+                  f"{result['pages']} pages ({result['bytes']} bytes) remain")
+        else:
+            print(f"{CACHE_FILE}: {len(cache)} cached pages, {cache.size_bytes()} bytes")
+        cache.close()
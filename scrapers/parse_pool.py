@@ -0,0 +1,82 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from scrapers.extract import extract_lead_text
+from scrapers.parsing import candidate_listings
+
+
+def extract_page(html, niche, preferred=None):
+    """
+    Extract the leads on one directory page. Returns (selector, leads) for
+    the first selector whose listings contain leads, trying preferred first,
+    or (None, []).
+
+    A plain function of the page so it can run in a ParsePool worker.
+    """
+    for selector, listings in candidate_listings(html, preferred):
+        leads = [lead for lead in (extract_lead_text(listing.get_text(separator=' ', strip=True), niche)
+                                   for listing in listings) if lead]
+        if leads:
+            return selector, leads
+    return None, []
+
+
+class ParsePool:
+    """
+    Worker processes for extract_page, so parsing runs on every core while the
+    crawl threads keep fetching.
+
+    In ordered mode results are released in the order pages were submitted;
+    otherwise each is released as soon as it is parsed.
+    """
+
+    def __init__(self, workers=None, ordered=True):
+        self.workers = workers or os.cpu_count() or 1
+        self.ordered = ordered
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, html, niche, preferred=None):
+        """Queue a page for parsing. Returns a future of extract_page's result."""
+        with self._lock:
+            if self._executor is None:
+                # Spawned rather than forked: the crawl threads may hold locks
+                # (the page cache, stdout) at the moment a worker starts
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+        return self._executor.submit(extract_page, html, niche, preferred)
+
+    def drain(self, pending, block=False):
+        """
+        Yield (key, future) for parsed pages from pending, a list of
+        (key, future) pairs, removing each from the list as it is yielded.
+        Without block, stops at the first page that is not ready to release.
+        """
+        while pending:
+            if self.ordered:
+                if not block and not pending[0][1].done():
+                    return
+                yield pending.pop(0)
+                continue
+            done = [item for item in pending if item[1].done()]
+            if not done:
+                if not block:
+                    return
+                wait([future for _, future in pending], return_when=FIRST_COMPLETED)
+                continue
+            for item in done:
+                pending.remove(item)
+                yield item
+
+    def map(self, pages, niche, preferred=None):
+        """Parse many pages, yielding (selector, leads) in page order or as each finishes."""
+        pending = [(i, self.submit(html, niche, preferred)) for i, html in enumerate(pages)]
+        for _, future in self.drain(pending, block=True):
+            yield future.result()
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
@@ -0,0 +1,75 @@
+import re
+from collections import namedtuple
+from bs4 import BeautifulSoup, SoupStrainer
+
+# Fastest available BeautifulSoup tree builder
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# Listing selectors, compiled once
+LISTING_CLASS = re.compile(r'listing|business|agent|doctor|tutor')
+CONTAINER_CLASS = re.compile(r'listing|business')
+PROFILE_HREF = re.compile(r'/agent/|/doctor/|/tutor/|/business/')
+
+Selector = namedtuple('Selector', 'name tag attrs strainer')
+
+# Tried in this order when a source has no learned selector
+SELECTORS = [
+    Selector('div', 'div', {'class': LISTING_CLASS}, SoupStrainer('div', attrs={'class': LISTING_CLASS})),
+    Selector('article', 'article', {'class': CONTAINER_CLASS}, SoupStrainer('article', attrs={'class': CONTAINER_CLASS})),
+    Selector('li', 'li', {'class': CONTAINER_CLASS}, SoupStrainer('li', attrs={'class': CONTAINER_CLASS})),
+    Selector('link', 'a', {'href': PROFILE_HREF}, SoupStrainer('a', attrs={'href': PROFILE_HREF})),
+]
+SELECTORS_BY_NAME = {selector.name: selector for selector in SELECTORS}
+
+# Only elements that can be listings are built into the tree; everything
+# else on the page (navigation, scripts, footers) is skipped while parsing.
+# LISTING_CLASS covers the div, article and li selectors, so one strained
+# parse serves all three; profile links are matched on href and need their own.
+CONTAINER_STRAINER = SoupStrainer(attrs={'class': LISTING_CLASS})
+
+
+def parse_html(html, parse_only=None, parser=None):
+    return BeautifulSoup(html, parser or HTML_PARSER, parse_only=parse_only)
+
+
+def candidate_listings(html, preferred=None, parser=None):
+    """
+    Lazily yield (selector name, listings) for each selector that matches
+    the page, trying the preferred selector first with a parse that builds
+    only its elements, then the rest in SELECTORS order.
+    """
+    if preferred in SELECTORS_BY_NAME:
+        selector = SELECTORS_BY_NAME[preferred]
+        listings = parse_html(html, selector.strainer, parser).find_all(selector.tag, attrs=selector.attrs)
+        if listings:
+            yield selector.name, listings
+
+    container_soup = None
+    for selector in SELECTORS:
+        if selector.name == preferred:
+            continue
+        if selector.name == 'link':
+            soup = parse_html(html, selector.strainer, parser)
+        else:
+            if container_soup is None:
+                container_soup = parse_html(html, CONTAINER_STRAINER, parser)
+            soup = container_soup
+        listings = soup.find_all(selector.tag, attrs=selector.attrs)
+        if listings:
+            yield selector.name, listings
+
+
+def find_listings(html, parser=None):
+    """
+    Return the business listing elements of a directory page.
+
+    Tries listing divs, then articles, then list items, then profile links,
+    and returns the first kind found, as the original full-tree search did.
+    """
+    for _, listings in candidate_listings(html, parser=parser):
+        return listings
+    return []
@@ -0,0 +1,117 @@
+import threading
+import time
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+import requests
+from config import ROBOTS_TTL_HOURS, ROBOTS_NEGATIVE_TTL_HOURS
+
+
+class RobotsCache:
+    """
+    Per-host robots.txt rules.
+
+    robots.txt is fetched once per scheme+netloc from the host root and kept
+    for ttl_hours. Hosts whose robots.txt could not be fetched are cached as
+    allowed, and hosts whose robots.txt gave a server error as disallowed,
+    for the shorter negative_ttl_hours. When conn is given, rules are
+    persisted in a 'robots' table of that SQLite connection (the page cache's),
+    guarded by lock when the connection is shared.
+    """
+
+    def __init__(self, user_agent, conn=None, lock=None, fetch=None,
+                 ttl_hours=ROBOTS_TTL_HOURS, negative_ttl_hours=ROBOTS_NEGATIVE_TTL_HOURS):
+        self.user_agent = user_agent
+        self.ttl = ttl_hours * 3600
+        self.negative_ttl = negative_ttl_hours * 3600
+        self.fetch = fetch or (lambda url: requests.get(url, headers={'User-Agent': user_agent}, timeout=10))
+        self.fetches = 0
+        self._parsers = {}  # host -> (RobotFileParser, expires_at)
+        self._host_locks = {}
+        self._lock = threading.Lock()
+        self.db_lock = lock or threading.RLock()
+        self.conn = conn
+        if conn is not None:
+            with self.db_lock:
+                self._create_table()
+
+    def _create_table(self):
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS robots (
+                host TEXT PRIMARY KEY,
+                status INTEGER NOT NULL,
+                body TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        ''')
+        self.conn.commit()
+
+    @staticmethod
+    def host_key(url):
+        """scheme://netloc of url, the unit robots.txt applies to."""
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def can_fetch(self, url):
+        return self._parser(url).can_fetch(self.user_agent, url)
+
+    def crawl_delay(self, url):
+        """Crawl-delay in seconds declared for our user agent, or None."""
+        delay = self._parser(url).crawl_delay(self.user_agent)
+        return float(delay) if delay is not None else None
+
+    def _parser(self, url):
+        host = self.host_key(url)
+        cached = self._parsers.get(host)
+        if cached and cached[1] > time.time():
+            return cached[0]
+        # One download per host even when several threads crawl it
+        with self._lock:
+            host_lock = self._host_locks.setdefault(host, threading.Lock())
+        with host_lock:
+            return self._load(host)
+
+    def _load(self, host):
+        now = time.time()
+        cached = self._parsers.get(host)
+        if cached and cached[1] > now:
+            return cached[0]
+
+        if self.conn is not None:
+            with self.db_lock:
+                row = self.conn.execute('SELECT status, body, expires_at FROM robots WHERE host = ?', (host,)).fetchone()
+            if row and row[2] > now:
+                parser = self._build_parser(row[0], row[1])
+                self._parsers[host] = (parser, row[2])
+                return parser
+
+        status, body = self._download(host)
+        # status 0 (a failed fetch) and 5xx are rechecked sooner; see _build_parser
+        expires_at = now + (self.negative_ttl if status == 0 or status >= 500 else self.ttl)
+        parser = self._build_parser(status, body)
+        self._parsers[host] = (parser, expires_at)
+        if self.conn is not None:
+            with self.db_lock:
+                self.conn.execute('INSERT OR REPLACE INTO robots (host, status, body, expires_at) VALUES (?, ?, ?, ?)',
+                                  (host, status, body, expires_at))
+                self.conn.commit()
+        return parser
+
+    def _download(self, host):
+        self.fetches += 1
+        try:
+            response = self.fetch(host + '/robots.txt')
+            return response.status_code, response.text if response.status_code == 200 else ''
+        except Exception:
+            return 0, ''
+
+    def _build_parser(self, status, body):
+        # Same status handling as RobotFileParser.read(), which leaves the
+        # parser unread on a server error so that can_fetch refuses everything;
+        # status 0 marks a failed fetch, assumed allowed
+        parser = RobotFileParser()
+        if status in (401, 403) or status >= 500:
+            parser.disallow_all = True
+        elif status != 200:
+            parser.allow_all = True
+        parser.parse(body.splitlines())
+        return parser
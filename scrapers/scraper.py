@@ -1,229 +1,400 @@
-import requests
-from bs4 import BeautifulSoup
-import re
 import pandas as pd
 from config import *
 import time
 import os
-from urllib.robotparser import RobotFileParser
-import json
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from scrapers.extract import extract_lead_text
+from scrapers.frontier import BLOCKED, DONE, FAILED, CrawlFrontier
+from scrapers.page_cache import PageCache
+from scrapers.parse_pool import ParsePool, extract_page
+from scrapers.robots_cache import RobotsCache
+from scrapers.selector_memory import SelectorMemory
+from scrapers.session import CrawlSession
+from scrapers.throttle import HostThrottle
+from scrapers.yield_stats import YieldStats
+
+class CachedResponse:
+    """Response-like wrapper for a page served from the page cache."""
+
+    def __init__(self, text, revalidated=False, fetched_at=None):
+        self.text = text
+        self.status_code = 200
+        self.revalidated = revalidated  # True when a 304 confirmed the cached copy; its leads are reused
+        # When the page was last fetched or revalidated, which is how fresh its leads are
+        self.fetched_at = time.time() if fetched_at is None else fetched_at
+
+class CrawlBudget:
+    """
+    Thread-safe count of leads found so far against a limit, which the
+    consumer can also end early. With a deadline (a time.monotonic() value)
+    the budget is exhausted once it passes.
+    """
+
+    def __init__(self, limit, deadline=None):
+        self.limit = limit
+        self.deadline = deadline
+        self.count = 0
+        self.stopped = False
+        self._lock = threading.Lock()
+
+    @property
+    def exhausted(self):
+        return (self.stopped or self.count >= self.limit or
+                (self.deadline is not None and time.monotonic() >= self.deadline))
+
+    def take(self):
+        """Claim room for one more lead. Returns False once the limit is reached."""
+        with self._lock:
+            if self.exhausted:
+                return False
+            self.count += 1
+            return True
+
+    def stop(self):
+        self.stopped = True
+
+_SOURCE_DONE = object()  # Queue marker: one source finished crawling
 
 class LeadScraper:
-    def __init__(self):
+    def __init__(self, max_age_hours=None):
         self.headers = {
             'User-Agent': DESCRIPTIVE_USER_AGENT
         }
-        self.cache = {} if CACHE_ENABLED else None
-        self.cache_file = 'scraper_cache.json'
+        self.http = CrawlSession(self.headers)
+        self.cache_file = CACHE_FILE
+        self.cache = PageCache(self.cache_file) if CACHE_ENABLED else None
+        # Cached pages older than this are re-fetched; see PACKAGE_FRESHNESS_HOURS
+        self.max_age_hours = max_age_hours
+        self.robots = RobotsCache(self.headers['User-Agent'],
+                                  conn=self.cache.conn if CACHE_ENABLED else None,
+                                  lock=self.cache.lock if CACHE_ENABLED else None,
+                                  fetch=lambda url: self._get(url))
+        self.throttle = HostThrottle()
+        self.selectors = SelectorMemory(conn=self.cache.conn if CACHE_ENABLED else None,
+                                        lock=self.cache.lock if CACHE_ENABLED else None)
+        self.yield_stats = YieldStats(conn=self.cache.conn if CACHE_ENABLED else None,
+                                      lock=self.cache.lock if CACHE_ENABLED else None)
+        self.frontier = CrawlFrontier(conn=self.cache.conn if CACHE_ENABLED else None,
+                                      lock=self.cache.lock if CACHE_ENABLED else None)
+        # Worker processes for parsing; None parses on the crawl threads
+        self.parse_pool = ParsePool(PARSE_WORKERS, PARSE_ORDERED) if PARSE_WORKERS != 0 else None
         self.load_cache()
 
     def load_cache(self):
-        if CACHE_ENABLED and os.path.exists(self.cache_file):
-            with open(self.cache_file, 'r') as f:
-                self.cache = json.load(f)
+        """Import a legacy JSON cache into the page cache, once."""
+        if CACHE_ENABLED and os.path.exists(LEGACY_CACHE_FILE):
+            imported = self.cache.import_json(LEGACY_CACHE_FILE)
+            os.replace(LEGACY_CACHE_FILE, LEGACY_CACHE_FILE + '.imported')
+            print(f"Imported {imported} pages from {LEGACY_CACHE_FILE}")
+
+    def close(self):
+        """Stop the parse workers and release the HTTP pool and cache."""
+        self.frontier.checkpoint()
+        if self.parse_pool is not None:
+            self.parse_pool.close()
+        self.http.close()
+        if CACHE_ENABLED:
+            self.cache.close()
 
     def save_cache(self):
+        """Commit pending cache writes and evict down to the byte budget."""
         if CACHE_ENABLED:
-            with open(self.cache_file, 'w') as f:
-                json.dump(self.cache, f)
+            self.cache.flush()
+            self.cache.evict()
+
+    def _get(self, url, headers=None):
+        # Retries wait for the host's throttle like any other request. robots.txt
+        # itself is fetched before the host's Crawl-delay is known, so its
+        # retries keep to RATE_LIMIT_SECONDS
+        if url.endswith('/robots.txt'):
+            wait = lambda: self.throttle.acquire(RobotsCache.host_key(url), RATE_LIMIT_SECONDS)
+        else:
+            wait = lambda: self.wait_for_host(url)
+        return self.http.get(url, wait=wait, headers=headers)
 
     def check_robots_txt(self, url):
         if not RESPECT_ROBOTS_TXT:
             return True
-        try:
-            rp = RobotFileParser()
-            rp.set_url(url + '/robots.txt')
-            rp.read()
-            return rp.can_fetch(self.headers['User-Agent'], url)
-        except:
-            return True  # If can't read robots.txt, assume allowed
-
-    def cached_request(self, url):
-        if CACHE_ENABLED and url in self.cache:
-            # Return cached text as response-like object
-            class MockResponse:
-                def __init__(self, text):
-                    self.text = text
-                    self.status_code = 200
-            return MockResponse(self.cache[url])
+        return self.robots.can_fetch(url)
+
+    def wait_for_host(self, url):
+        """
+        Sleep until the host's token bucket allows another request.
+        Uses the host's robots.txt Crawl-delay when declared, else RATE_LIMIT_SECONDS.
+        """
+        delay = self.robots.crawl_delay(url) if RESPECT_ROBOTS_TXT else None
+        if delay is None:
+            delay = RATE_LIMIT_SECONDS
+        self.throttle.acquire(RobotsCache.host_key(url), delay)
+
+    def cached_request(self, url, max_age_hours=None):
+        if max_age_hours is None:
+            max_age_hours = self.max_age_hours
+        entry = self.cache.get_entry(url) if CACHE_ENABLED else None
+        if entry is not None and PageCache.is_fresh(entry, max_age_hours):
+            return CachedResponse(entry['text'], fetched_at=entry['fetched_at'])
         if not self.check_robots_txt(url):
             print(f"Blocked by robots.txt: {url}")
             return None
-        response = requests.get(url, headers=self.headers, timeout=10)
+
+        # Revalidate a stale copy instead of downloading it again
+        conditional = {}
+        if entry is not None:
+            if entry['etag']:
+                conditional['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                conditional['If-Modified-Since'] = entry['last_modified']
+
+        self.wait_for_host(url)
+        response = self._get(url, headers=conditional or None)
+        if response.status_code == 304 and entry is not None:
+            self.cache.touch(url, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            return CachedResponse(entry['text'], revalidated=True)
         if response.status_code != 200:
             return response  # Return even failed for status check
         if CACHE_ENABLED:
-            self.cache[url] = response.text
-            self.save_cache()
-        time.sleep(RATE_LIMIT_SECONDS)
+            self.cache.put(url, response.text, etag=response.headers.get('ETag'),
+                           last_modified=response.headers.get('Last-Modified'))
         return response
 
-    def scrape_leads(self, niche, max_pages=5):
+    def scrape_leads(self, niche, max_pages=5, max_age_hours=None, max_concurrency=None, target_count=None,
+                     sources=None, resume=False, deadline=None):
         """
         Scrape leads for a given niche from niche-specific sources.
+        Returns a DataFrame in source order; see iter_leads for the arguments.
         """
-        leads = []
         if niche not in NICHE_SOURCES:
             print(f"No sources defined for niche: {niche}")
             return pd.DataFrame()
 
-        sources = NICHE_SOURCES[niche]
-
-        for source in sources:
-            print(f"\nTrying source: {source['name']}")
-            source_leads = []
+        order = {source['name']: i for i, source in enumerate(NICHE_SOURCES[niche])}
+        leads = list(self.iter_leads(niche, max_pages, max_age_hours, max_concurrency, target_count, sources,
+                                     resume, deadline))
+        # Keep source order so results match a sequential crawl
+        leads.sort(key=lambda lead: order[lead['source']])
+        return pd.DataFrame(leads)
 
-            # Construct search URL for this source
-            region_formatted = TARGET_REGION.replace(' ', '+')
-            if '{query}' in source['search_path']:
-                query = niche.replace('_', '+')
-                search_path = source['search_path'].format(query=query, region=region_formatted)
-            else:
-                search_path = source['search_path'].format(region=region_formatted)
+    def iter_leads(self, niche, max_pages=5, max_age_hours=None, max_concurrency=None, target_count=None,
+                   sources=None, resume=False, deadline=None):
+        """
+        Lazily yield leads for a niche as the crawl finds them.
+
+        Sources are crawled in parallel, up to max_concurrency at once (default
+        MAX_CONCURRENCY); each host still gets at most one request per crawl delay.
+        sources limits the crawl to the niche's sources with those names.
+        Cached pages older than max_age_hours (default: the scraper's) are re-fetched.
+        With target_count, the crawl stops after enough raw leads to expect that
+        many clean ones, based on each source's past yield. It also stops as soon
+        as the consumer stops iterating, or at deadline (a time.monotonic() value).
+
+        Every page's outcome is checkpointed in the crawl frontier. With resume,
+        pages already crawled within max_age_hours are replayed from it instead
+        of being fetched and parsed again.
+        """
+        if niche not in NICHE_SOURCES:
+            print(f"No sources defined for niche: {niche}")
+            return
+
+        names = sources
+        sources = [source for source in NICHE_SOURCES[niche] if names is None or source['name'] in names]
+        if not sources:
+            return
+        limit = MAX_LEADS_PER_SCRAPE
+        if target_count is not None:
+            limit = min(limit, self.yield_stats.raw_target([source['name'] for source in sources], target_count))
+            print(f"Targeting {target_count} clean leads: crawling up to {limit} raw leads")
+        budget = CrawlBudget(limit, deadline)
+        # Bounded so crawl threads wait for a slow consumer instead of running ahead
+        found = queue.Queue(maxsize=LEAD_BUFFER_SIZE)
+        workers = max(1, min(max_concurrency or MAX_CONCURRENCY, len(sources)))
+        pool = ThreadPoolExecutor(max_workers=workers)
+
+        def emit(item):
+            while not budget.stopped:
+                try:
+                    found.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
 
-            base_url = f"{source['url']}{search_path}"
-            print(f"Scraping URL: {base_url}")
+        def crawl(source):
+            try:
+                self.scrape_source(source, niche, max_pages, max_age_hours, budget, emit, resume)
+            finally:
+                emit(_SOURCE_DONE)
 
-            for page in range(1, max_pages + 1):
-                page_url = f"{base_url}&page={page}" if page > 1 else base_url
-                print(f"Fetching page {page}: {page_url}")
+        for source in sources:
+            pool.submit(crawl, source)
 
-                try:
-                    response_text = self.cached_request(page_url)
-                    if response_text is None:
-                        continue
-                    if hasattr(response_text, 'status_code') and response_text.status_code != 200:
-                        print(f"Failed to fetch page {page} from {source['name']}, status: {response_text.status_code}")
-                        continue
-                    elif hasattr(response_text, 'status_code'):
-                        soup = BeautifulSoup(response_text.text, 'html.parser')
-                    else:
-                        soup = BeautifulSoup(response_text, 'html.parser')
-
-                    # Try different selectors for business listings
-                    business_listings = (
-                        soup.find_all('div', class_=re.compile(r'listing|business|agent|doctor|tutor')) or
-                        soup.find_all('article', class_=re.compile(r'listing|business')) or
-                        soup.find_all('li', class_=re.compile(r'listing|business')) or
-                        soup.find_all('a', href=re.compile(r'/agent/|/doctor/|/tutor/|/business/'))
-                    )
-
-                    print(f"Found {len(business_listings)} potential listings on page {page}")
-
-                    for listing in business_listings:
-                        lead = self.extract_lead(listing, niche)
-                        if lead:
-                            source_leads.append(lead)
-                            leads.append(lead)
-                            print(f"Extracted lead: {lead['name']}")
-                        if len(leads) >= 500:  # Global limit
-                            break
-
-                    if len(leads) >= 500:
-                        break
-
-                except Exception as e:
-                    print(f"Error scraping {source['name']} page {page}: {e}")
+        yielded = 0
+        try:
+            remaining = len(sources)
+            while remaining:
+                lead = found.get()
+                if lead is _SOURCE_DONE:
+                    remaining -= 1
                     continue
+                yielded += 1
+                yield lead
+        finally:
+            budget.stop()
+            pool.shutdown(wait=True)
+            self.frontier.checkpoint()
+            self.save_cache()
+            http_stats = self.http.stats()
+            print(f"\nTotal leads scraped from all sources: {yielded}")
+            print(f"Crawl frontier for {niche}: {self.frontier.progress(niche)}")
+            print(f"HTTP requests: {http_stats['requests']}, not modified: {http_stats['not_modified']}, "
+                  f"retries: {http_stats['retries']}, connections reused: {http_stats['connections_reused']}")
+
+    def record_yield(self, raw_counts, kept_counts):
+        """Update per-source yield history from one run's raw and clean lead counts per source."""
+        for source, raw in raw_counts.items():
+            if source is not None:
+                self.yield_stats.record(source, int(raw), int(kept_counts.get(source, 0)))
+
+    def source_url(self, source, niche):
+        """Search URL for a source, filled in with the niche and target region."""
+        region_formatted = TARGET_REGION.replace(' ', '+')
+        if '{query}' in source['search_path']:
+            query = niche.replace('_', '+')
+            search_path = source['search_path'].format(query=query, region=region_formatted)
+        else:
+            search_path = source['search_path'].format(region=region_formatted)
+        return f"{source['url']}{search_path}"
+
+    def scrape_source(self, source, niche, max_pages=5, max_age_hours=None, budget=None, emit=None, resume=False):
+        """
+        Scrape up to max_pages pages of one source, passing each lead to emit as
+        it is found. Stops early once the shared budget is exhausted by this or
+        any other source. Returns the source's leads.
 
-            print(f"Leads from {source['name']}: {len(source_leads)}")
-
-            if len(leads) >= 500:  # Global limit
+        With a parse pool, fetched pages are parsed in worker processes while
+        the next page is fetched. With resume, pages the frontier has as done
+        are replayed from it.
+        """
+        print(f"\nTrying source: {source['name']}")
+        source_leads = []
+        pending = []  # ((page, url, fetched_at), future) for pages handed to the parse pool
+        base_url = self.source_url(source, niche)
+        if max_age_hours is None:
+            max_age_hours = self.max_age_hours
+        print(f"Scraping URL: {base_url}")
+
+        for page in range(1, max_pages + 1):
+            if budget is not None and budget.exhausted:
                 break
+            page_url = f"{base_url}&page={page}" if page > 1 else base_url
 
-        print(f"\nTotal leads scraped from all sources: {len(leads)}")
-        return pd.DataFrame(leads)
+            if resume:
+                done_leads = self.frontier.done_leads(page_url, max_age_hours)
+                if done_leads is not None:
+                    print(f"Resuming: page {page} already crawled")
+                    self.add_page_leads(source, page, done_leads, source_leads, budget, emit)
+                    continue
+
+            print(f"Fetching page {page}: {page_url}")
+            try:
+                response_text = self.cached_request(page_url, max_age_hours)
+                if response_text is None:
+                    self.frontier.record(page_url, niche, source['name'], page, BLOCKED)
+                    continue
+                if hasattr(response_text, 'status_code') and response_text.status_code != 200:
+                    print(f"Failed to fetch page {page} from {source['name']}, status: {response_text.status_code}")
+                    self.frontier.record(page_url, niche, source['name'], page, FAILED,
+                                         error=f"HTTP {response_text.status_code}")
+                    continue
+                # Leads are as fresh as the page they came from, which may be a cached copy
+                cached = isinstance(response_text, CachedResponse)
+                fetched_at = response_text.fetched_at if cached else time.time()
+                if cached and response_text.revalidated:
+                    # A 304 confirmed the cached copy: its leads are the ones parsed last time
+                    page_leads = self.frontier.done_leads(page_url)
+                    if page_leads is not None:
+                        print(f"Page {page} not modified, reusing its leads")
+                        self.frontier.record(page_url, niche, source['name'], page, DONE, page_leads,
+                                             fetched_at=fetched_at)
+                        self.add_page_leads(source, page, page_leads, source_leads, budget, emit, fetched_at)
+                        continue
+                html = response_text.text if hasattr(response_text, 'status_code') else response_text
+
+                if self.parse_pool is None:
+                    page_leads = self.parse_page(html, niche, source['name'])
+                    self.frontier.record(page_url, niche, source['name'], page, DONE, page_leads, fetched_at=fetched_at)
+                    self.add_page_leads(source, page, page_leads, source_leads, budget, emit, fetched_at)
+                else:
+                    future = self.parse_pool.submit(html, niche, self.selectors.get(source['name']))
+                    pending.append(((page, page_url, fetched_at), future))
+                    self.collect_parsed(source, niche, pending, source_leads, budget, emit)
+
+            except Exception as e:
+                print(f"Error scraping {source['name']} page {page}: {e}")
+                self.frontier.record(page_url, niche, source['name'], page, FAILED, error=str(e))
+                continue
+
+        if pending:
+            if budget is not None and budget.exhausted:
+                for _, future in pending:
+                    future.cancel()
+            self.collect_parsed(source, niche, pending, source_leads, budget, emit, block=True)
+
+        print(f"Leads from {source['name']}: {len(source_leads)}")
+        return source_leads
+
+    def collect_parsed(self, source, niche, pending, source_leads, budget, emit, block=False):
+        """Hand on the leads of pages the parse pool has finished; with block, wait for all of them."""
+        for (page, page_url, fetched_at), future in self.parse_pool.drain(pending, block):
+            if future.cancelled():
+                continue
+            try:
+                selector, page_leads = future.result()
+            except Exception as e:
+                print(f"Error parsing {source['name']} page {page}: {e}")
+                self.frontier.record(page_url, niche, source['name'], page, FAILED, error=str(e))
+                continue
+            self.update_selector(source['name'], selector)
+            self.frontier.record(page_url, niche, source['name'], page, DONE, page_leads, fetched_at=fetched_at)
+            self.add_page_leads(source, page, page_leads, source_leads, budget, emit, fetched_at)
+
+    def add_page_leads(self, source, page, page_leads, source_leads, budget, emit, fetched_at=None):
+        """Hand on a page's leads, stamped with their source and, when given, the page's fetch time as seen_at."""
+        print(f"Extracted {len(page_leads)} leads on page {page}")
+        for lead in page_leads:
+            if budget is not None and not budget.take():
+                break
+            lead['source'] = source['name']
+            if fetched_at is not None:
+                lead['seen_at'] = fetched_at
+            source_leads.append(lead)
+            print(f"Extracted lead: {lead['name']}")
+            if emit is not None:
+                emit(lead)
+
+    def parse_page(self, html, niche, source_name):
+        """
+        Extract the leads on one page of a source. The selector that last
+        produced leads for the source is tried first; when it finds nothing the
+        other selectors are tried and the source's choice is updated.
+        """
+        selector, leads = extract_page(html, niche, self.selectors.get(source_name))
+        self.update_selector(source_name, selector)
+        return leads
+
+    def update_selector(self, source_name, selector):
+        """Remember the selector that found a page's leads, or forget the source's if none did."""
+        if selector is None:
+            self.selectors.forget(source_name)
+        else:
+            print(f"Found leads with '{selector}' selector")
+            self.selectors.remember(source_name, selector)
 
     def extract_lead(self, listing, niche):
         """
         Extract information from a single listing.
         """
-        # Get all text content
-        full_text = listing.get_text(separator=' ', strip=True)
-
-        # Skip if this looks like footer/navigation content
-        skip_keywords = ['premium user', 'view details', 'operating:', 'open now', 'closed now',
-                        'previous next', 'the new yep!', '© yep!', 'waterproofing professionals',
-                        'home services', 'building contractors']
-        if any(keyword.lower() in full_text.lower() for keyword in skip_keywords):
-            return None
-
-        # Try to extract structured data first
-        name = None
-        address = None
-        phone = None
-
-        # Look for common patterns in the text
-        # Pattern 1: Name followed by address
-        lines = full_text.split(',')
-        if len(lines) >= 2:
-            # First part might be name
-            potential_name = lines[0].strip()
-            if len(potential_name) > 3 and not potential_name.isdigit():
-                name = potential_name
-
-            # Look for address pattern (street, city, postal code)
-            for line in lines:
-                line = line.strip()
-                # Check if it looks like an address (contains street numbers, city names, postal codes)
-                if (re.search(r'\d+', line) and  # Has numbers
-                    any(city in line.lower() for city in ['cape town', 'johannesburg', 'durban', 'pretoria', 'port elizabeth', 'bloemfontein', 'east london', 'kimberley']) or
-                    re.search(r'\d{4}', line)):  # Has postal code
-                    address = line
-                    break
-
-        # If no structured extraction, try to parse the full text
-        if not name:
-            # Remove common prefixes and try to extract business name
-            text = re.sub(r'^(premium user|[A-Z])', '', full_text).strip()
-            # Take first meaningful part as name
-            parts = text.split()
-            if parts:
-                # Find a sequence that looks like a business name
-                name_parts = []
-                for part in parts[:5]:  # Check first 5 words
-                    if len(part) > 2 and not part.isdigit():
-                        name_parts.append(part)
-                    else:
-                        break
-                name = ' '.join(name_parts) if name_parts else None
-
-        # Extract phone number using more comprehensive regex
-        phone_patterns = [
-            r'\b\d{3}[-.\s]\d{3}[-.\s]\d{4}\b',  # 123-456-7890
-            r'\b\d{10}\b',                        # 1234567890
-            r'\+\d{2}[-.\s]\d{1}[-.\s]\d{3}[-.\s]\d{3}[-.\s]\d{3}\b',  # +27 1 234 567 890
-            r'\d{2}[-.\s]\d{3}[-.\s]\d{4}',      # 27 123 4567 (South African)
-        ]
-
-        for pattern in phone_patterns:
-            phones = re.findall(pattern, full_text)
-            if phones:
-                phone = phones[0]
-                break
-
-        # Clean up the extracted data
-        if name:
-            # Remove extra whitespace and clean up
-            name = re.sub(r'\s+', ' ', name).strip()
-            # Remove if it's too short or looks like garbage
-            if len(name) < 3 or name.isdigit():
-                name = None
-
-        if address:
-            address = re.sub(r'\s+', ' ', address).strip()
-
-        # Only return if we have at least a name
-        if name:
-            return {
-                'name': name,
-                'phone': phone or 'N/A',
-                'address': address or 'N/A',
-                'category': niche,
-                'niche': niche
-            }
-
-        return None
+        return extract_lead_text(listing.get_text(separator=' ', strip=True), niche)
 
 if __name__ == '__main__':
     scraper = LeadScraper()
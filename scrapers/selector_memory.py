@@ -0,0 +1,49 @@
+import threading
+import time
+
+
+class SelectorMemory:
+    """
+    Which listing selector (see scrapers.parsing.SELECTORS) last produced
+    leads for each source, so later pages and runs try it first.
+
+    Stored in a 'source_selectors' table of the page cache connection.
+    """
+
+    def __init__(self, conn=None, lock=None):
+        self.conn = conn
+        self.lock = lock or threading.RLock()
+        self._selectors = {}
+        if conn is not None:
+            with self.lock:
+                self.conn.execute('''
+                    CREATE TABLE IF NOT EXISTS source_selectors (
+                        source TEXT PRIMARY KEY,
+                        selector TEXT NOT NULL,
+                        updated_at REAL NOT NULL
+                    )
+                ''')
+                self.conn.commit()
+                self._selectors = dict(self.conn.execute('SELECT source, selector FROM source_selectors'))
+
+    def get(self, source):
+        return self._selectors.get(source)
+
+    def remember(self, source, selector):
+        if self._selectors.get(source) == selector:
+            return
+        self._selectors[source] = selector
+        if self.conn is not None:
+            with self.lock:
+                self.conn.execute('INSERT OR REPLACE INTO source_selectors (source, selector, updated_at) VALUES (?, ?, ?)',
+                                  (source, selector, time.time()))
+                self.conn.commit()
+
+    def forget(self, source):
+        """Drop a source's selector after it stopped yielding leads."""
+        if self._selectors.pop(source, None) is None:
+            return
+        if self.conn is not None:
+            with self.lock:
+                self.conn.execute('DELETE FROM source_selectors WHERE source = ?', (source,))
+                self.conn.commit()
@@ -0,0 +1,118 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+import requests
+from requests.adapters import HTTPAdapter
+from config import (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_POOL_HOSTS, HTTP_POOL_MAXSIZE,
+                    HTTP_MAX_RETRIES, HTTP_BACKOFF_SECONDS, HTTP_BACKOFF_MAX_SECONDS, HTTP_RETRY_STATUSES)
+
+try:
+    import brotli  # noqa: F401  (urllib3 decodes br responses when this is installed)
+    ACCEPT_ENCODING = 'gzip, br'
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = 'gzip, br'
+    except ImportError:
+        ACCEPT_ENCODING = 'gzip, deflate'
+
+
+class CrawlSession:
+    """
+    Shared HTTP session for the crawler.
+
+    Connections are pooled and kept alive per host, responses are requested
+    compressed, and 429/5xx responses or connection errors are retried with
+    jittered exponential backoff, honouring Retry-After when the server sends it.
+    Callers that rate-limit hosts pass a wait hook so retries are limited too.
+    """
+
+    def __init__(self, headers, connect_timeout=HTTP_CONNECT_TIMEOUT, read_timeout=HTTP_READ_TIMEOUT,
+                 max_retries=HTTP_MAX_RETRIES, pool_maxsize=HTTP_POOL_MAXSIZE):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        self.session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        self.adapter = HTTPAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=pool_maxsize,
+                                   pool_block=True, max_retries=0)
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+        self.requests = 0
+        self.retries = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, wait=None, **kwargs):
+        """
+        GET url, retrying transient failures. wait, if given, is called after
+        the backoff before every retry, e.g. to wait for the host's rate limit.
+        Returns the last response or raises the last error.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        attempt = 0
+        while True:
+            with self._lock:
+                self.requests += 1
+            try:
+                response = self.session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.backoff(attempt)
+            else:
+                if response.status_code == 304:
+                    with self._lock:
+                        self.not_modified += 1
+                if response.status_code not in HTTP_RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                delay = self.retry_after(response)
+                if delay is None:
+                    delay = self.backoff(attempt)
+                response.close()
+            with self._lock:
+                self.retries += 1
+            attempt += 1
+            time.sleep(delay)
+            if wait is not None:
+                wait()
+
+    def backoff(self, attempt):
+        """Full-jitter exponential backoff for the given retry attempt."""
+        return random.uniform(0, min(HTTP_BACKOFF_MAX_SECONDS, HTTP_BACKOFF_SECONDS * 2 ** attempt))
+
+    @staticmethod
+    def retry_after(response):
+        """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None."""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            seconds = float(value)
+        except ValueError:
+            try:
+                seconds = parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return None
+        return min(max(seconds, 0), HTTP_BACKOFF_MAX_SECONDS)
+
+    def stats(self):
+        """Request, retry and connection counters for this session."""
+        opened = served = 0
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+                served += pool.num_requests
+        return {
+            'requests': self.requests,
+            'retries': self.retries,
+            'not_modified': self.not_modified,
+            'connections_opened': opened,
+            'connections_reused': max(served - opened, 0)
+        }
+
+    def close(self):
+        self.session.close()
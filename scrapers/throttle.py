@@ -0,0 +1,35 @@
+import threading
+import time
+
+
+class HostThrottle:
+    """
+    Per-host token buckets shared by all crawl threads.
+
+    Each host's bucket holds up to `burst` tokens and refills at one token per
+    `delay` seconds, so requests to one host are spaced by its delay while
+    requests to different hosts never wait on each other.
+    """
+
+    def __init__(self, burst=1):
+        self.burst = burst
+        self._buckets = {}  # host -> [tokens, last_refill]
+        self._lock = threading.Lock()
+
+    def acquire(self, host, delay):
+        """Block until a request to host may be sent. Returns the seconds waited."""
+        with self._lock:
+            now = time.monotonic()
+            tokens, last = self._buckets.get(host, (self.burst, now))
+            if delay > 0:
+                tokens = min(self.burst, tokens + (now - last) / delay)
+            else:
+                tokens = self.burst
+            # Take the token now, going negative if needed, so concurrent
+            # callers queue up one delay apart instead of all waking together
+            tokens -= 1
+            self._buckets[host] = [tokens, now]
+            wait = -tokens * delay if tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
@@ -0,0 +1,65 @@
+import math
+import threading
+import time
+from config import DEFAULT_SOURCE_YIELD, MIN_SOURCE_YIELD, TARGET_HEADROOM, YIELD_HISTORY_WEIGHT
+
+
+class YieldStats:
+    """
+    Per-source history of how many raw leads survive cleaning.
+
+    Counts are decayed by YIELD_HISTORY_WEIGHT on every update so recent runs
+    dominate. Stored in a 'source_yield' table of the page cache connection.
+    """
+
+    def __init__(self, conn=None, lock=None):
+        self.conn = conn
+        self.lock = lock or threading.RLock()
+        self._memory = {}  # source -> (raw, kept) when no connection is given
+        if conn is not None:
+            with self.lock:
+                self.conn.execute('''
+                    CREATE TABLE IF NOT EXISTS source_yield (
+                        source TEXT PRIMARY KEY,
+                        raw REAL NOT NULL,
+                        kept REAL NOT NULL,
+                        updated_at REAL NOT NULL
+                    )
+                ''')
+                self.conn.commit()
+
+    def _load(self, source):
+        if self.conn is None:
+            return self._memory.get(source)
+        with self.lock:
+            return self.conn.execute('SELECT raw, kept FROM source_yield WHERE source = ?', (source,)).fetchone()
+
+    def record(self, source, raw, kept):
+        """Add one run's raw and kept lead counts for a source."""
+        previous = self._load(source) or (0, 0)
+        raw = previous[0] * YIELD_HISTORY_WEIGHT + raw
+        kept = previous[1] * YIELD_HISTORY_WEIGHT + kept
+        if self.conn is None:
+            self._memory[source] = (raw, kept)
+            return
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO source_yield (source, raw, kept, updated_at) VALUES (?, ?, ?, ?)',
+                              (source, raw, kept, time.time()))
+            self.conn.commit()
+
+    def yield_ratio(self, source):
+        """Fraction of a source's raw leads expected to survive cleaning."""
+        row = self._load(source)
+        if not row or row[0] <= 0:
+            return DEFAULT_SOURCE_YIELD
+        return max(MIN_SOURCE_YIELD, row[1] / row[0])
+
+    def raw_target(self, sources, target_count):
+        """
+        Raw leads to crawl from the given source names to end up with
+        target_count clean leads, with TARGET_HEADROOM on top.
+        """
+        if not sources:
+            return target_count
+        expected = sum(self.yield_ratio(source) for source in sources) / len(sources)
+        return math.ceil(target_count / expected * TARGET_HEADROOM)
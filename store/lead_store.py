@@ -0,0 +1,225 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+import pandas as pd
+from cleaner.cleaner import SA_REGIONS
+from cleaner.dedupe import is_missing, normalize_name, normalize_phone
+from config import LEAD_STORE_BATCH_SIZE, LEAD_STORE_FILE
+from pipeline import batched
+
+REGION_PATTERN = re.compile('|'.join(re.escape(region) for region in SA_REGIONS), re.IGNORECASE)
+
+# Lead fields stored in the leads table, in column order
+LEAD_FIELDS = ['name', 'phone', 'address', 'category', 'niche', 'region', 'score']
+
+
+def dedupe_key(lead):
+    """Key identifying a business within a niche across runs: niche, normalized name and phone."""
+    return '|'.join([str(lead.get('niche') or ''), normalize_name(lead.get('name')),
+                     normalize_phone(lead.get('phone'))])
+
+
+def region_of(address):
+    """First city or province named in an address, in title case, or None."""
+    if not isinstance(address, str):
+        return None
+    match = REGION_PATTERN.search(address)
+    return match.group().title() if match else None
+
+
+class LeadStore:
+    """
+    Clean leads kept across runs in SQLite, one row per business per niche.
+
+    Leads are upserted on dedupe_key: a lead seen again updates last_seen and
+    fills in fields it was missing, and every source that listed it is kept
+    in lead_sources. Queries by niche, freshness and score use indexes, so a
+    package can be served from the store instead of a crawl.
+    """
+
+    def __init__(self, path=LEAD_STORE_FILE, batch_size=LEAD_STORE_BATCH_SIZE):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('PRAGMA foreign_keys=ON')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS leads (
+                id INTEGER PRIMARY KEY,
+                dedupe_key TEXT NOT NULL UNIQUE,
+                name TEXT NOT NULL,
+                phone TEXT NOT NULL DEFAULT 'N/A',
+                address TEXT NOT NULL DEFAULT 'N/A',
+                category TEXT,
+                niche TEXT NOT NULL,
+                region TEXT,
+                score INTEGER NOT NULL DEFAULT 0,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS lead_sources (
+                lead_id INTEGER NOT NULL REFERENCES leads (id) ON DELETE CASCADE,
+                source TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                PRIMARY KEY (lead_id, source)
+            );
+            CREATE INDEX IF NOT EXISTS idx_leads_niche_score ON leads (niche, score DESC);
+            CREATE INDEX IF NOT EXISTS idx_leads_niche_seen ON leads (niche, last_seen);
+            CREATE INDEX IF NOT EXISTS idx_leads_region ON leads (region);
+            CREATE INDEX IF NOT EXISTS idx_lead_sources_source ON lead_sources (source, last_seen);
+        ''')
+        self.conn.commit()
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM leads').fetchone()[0]
+
+    def upsert(self, leads, niche=None, seen_at=None):
+        """
+        Insert or refresh clean leads, batch_size per transaction. niche
+        fills in leads without one. A lead is stored as seen at its own
+        seen_at (when its page was fetched, see LeadScraper) or else at
+        seen_at (default: now). Returns the number of leads written.
+        """
+        seen_at = time.time() if seen_at is None else seen_at
+        written = 0
+        for batch in batched(leads, self.batch_size):
+            rows = []
+            sources = []
+            for lead in batch:
+                lead = {field: None if is_missing(value) else value for field, value in lead.items()}
+                if niche is not None and not lead.get('niche'):
+                    lead['niche'] = niche
+                if not lead.get('name') or not lead.get('niche'):
+                    continue
+                key = dedupe_key(lead)
+                lead_seen_at = float(lead.get('seen_at') or seen_at)
+                rows.append((key, lead['name'], lead.get('phone') or 'N/A', lead.get('address') or 'N/A',
+                             lead.get('category'), lead['niche'], region_of(lead.get('address')),
+                             int(lead.get('score') or 0), lead_seen_at, lead_seen_at))
+                if lead.get('source'):
+                    sources.append((lead['source'], lead_seen_at, lead_seen_at, key))
+            with self.lock:
+                with self.conn:
+                    self.conn.executemany('''
+                        INSERT INTO leads (dedupe_key, name, phone, address, category, niche, region, score,
+                                           first_seen, last_seen)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (dedupe_key) DO UPDATE SET
+                            name = excluded.name,
+                            phone = CASE WHEN excluded.phone = 'N/A' THEN leads.phone ELSE excluded.phone END,
+                            address = CASE WHEN excluded.address = 'N/A' THEN leads.address ELSE excluded.address END,
+                            category = COALESCE(excluded.category, leads.category),
+                            region = COALESCE(excluded.region, leads.region),
+                            score = MAX(excluded.score, leads.score),
+                            last_seen = MAX(excluded.last_seen, leads.last_seen)
+                    ''', rows)
+                    self.conn.executemany('''
+                        INSERT INTO lead_sources (lead_id, source, first_seen, last_seen)
+                        SELECT id, ?, ?, ? FROM leads WHERE dedupe_key = ?
+                        ON CONFLICT (lead_id, source) DO UPDATE SET
+                            last_seen = MAX(excluded.last_seen, lead_sources.last_seen)
+                    ''', sources)
+            written += len(rows)
+        return written
+
+    def _where(self, niche=None, max_age_hours=None, region=None):
+        clauses, params = [], []
+        if niche is not None:
+            clauses.append('niche = ?')
+            params.append(niche)
+        if max_age_hours is not None:
+            clauses.append('last_seen >= ?')
+            params.append(time.time() - max_age_hours * 3600)
+        if region is not None:
+            clauses.append('region = ?')
+            params.append(region)
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def count(self, niche=None, max_age_hours=None, region=None):
+        """Number of stored leads matching the filters."""
+        where, params = self._where(niche, max_age_hours, region)
+        with self.lock:
+            return self.conn.execute(f'SELECT COUNT(*) FROM leads{where}', params).fetchone()[0]
+
+    def query(self, niche=None, max_age_hours=None, region=None, limit=None):
+        """
+        Stored leads, best score first, seen within max_age_hours and in the
+        given niche and region when set. Returns lead dicts without ids.
+        """
+        with self.lock:
+            return list(self.iter_leads(niche, max_age_hours, region, limit))
+
+    def iter_leads(self, niche=None, max_age_hours=None, region=None, limit=None):
+        """query as a generator, fetching batch_size rows at a time so whole-store exports stay small in memory."""
+        where, params = self._where(niche, max_age_hours, region)
+        sql = (f'SELECT {", ".join(LEAD_FIELDS)}, first_seen, last_seen FROM leads{where} '
+               f'ORDER BY score DESC, id')
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(int(limit))
+        with self.lock:
+            cursor = self.conn.execute(sql, params)
+        while True:
+            with self.lock:
+                rows = cursor.fetchmany(self.batch_size)
+            if not rows:
+                return
+            for row in rows:
+                yield dict(row)
+
+    def to_frame(self, niche=None, max_age_hours=None, region=None, limit=None):
+        """query as a DataFrame numbered from 1 like LeadCleaner.clean_leads."""
+        df = pd.DataFrame(self.query(niche, max_age_hours, region, limit),
+                          columns=LEAD_FIELDS + ['first_seen', 'last_seen'])
+        df['id'] = df.index + 1
+        return df
+
+    def sources(self, lead):
+        """Sources that have listed a stored lead, earliest first."""
+        with self.lock:
+            return [row[0] for row in self.conn.execute(
+                'SELECT source FROM lead_sources JOIN leads ON leads.id = lead_sources.lead_id '
+                'WHERE dedupe_key = ? ORDER BY lead_sources.first_seen, source', (dedupe_key(lead),))]
+
+    def source_freshness(self, niche):
+        """When each source last listed a lead of the niche: {source: last_seen}."""
+        with self.lock:
+            return dict(self.conn.execute(
+                'SELECT source, MAX(lead_sources.last_seen) FROM lead_sources JOIN leads ON leads.id = lead_sources.lead_id '
+                'WHERE niche = ? GROUP BY source', (niche,)).fetchall())
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class StoreSink:
+    """LeadPipeline sink that upserts each batch of clean leads into a LeadStore."""
+
+    def __init__(self, store, niche=None):
+        self.store = store
+        self.niche = niche
+        self.written = 0
+
+    def write(self, batch):
+        self.written += self.store.upsert(batch, niche=self.niche)
+
+
+if __name__ == '__main__':
+    if not os.path.exists(LEAD_STORE_FILE):
+        print(f"No lead store at {LEAD_STORE_FILE}")
+    else:
+        store = LeadStore()
+        print(f"{LEAD_STORE_FILE}: {len(store)} leads")
+        with store.lock:
+            for niche, leads, newest in store.conn.execute(
+                    'SELECT niche, COUNT(*), MAX(last_seen) FROM leads GROUP BY niche ORDER BY niche'):
+                print(f"  {niche}: {leads} leads, last seen {time.strftime('%Y-%m-%d %H:%M', time.localtime(newest))}")
+        store.close()
@@ -0,0 +1,136 @@
+import os
+import re
+import time
+import uuid
+import pandas as pd
+from config import SNAPSHOT_DIR, SNAPSHOT_FORMAT, SNAPSHOT_LEADS
+from store.lead_store import REGION_PATTERN
+
+# Optional: snapshots are skipped when pyarrow is not installed
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+except ImportError:
+    pa = None
+
+CITY_PATTERN = re.compile(f'({REGION_PATTERN.pattern})', re.IGNORECASE)
+# Columns kept in a snapshot, in order; niche and date become its partition directories
+SNAPSHOT_COLUMNS = ['id', 'name', 'phone', 'address', 'category', 'city', 'source', 'score', 'niche', 'date']
+FILE_EXTENSIONS = {'parquet': 'parquet', 'feather': 'arrow'}
+
+
+def snapshots_available():
+    return pa is not None
+
+
+def snapshot_schema():
+    """Arrow schema of a snapshot, with the low-cardinality category and city dictionary-encoded."""
+    text = pa.string()
+    labels = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([('id', pa.int64()), ('name', text), ('phone', text), ('address', text), ('category', labels),
+                      ('city', labels), ('source', text), ('score', pa.int64()), ('niche', text), ('date', text)])
+
+
+def lead_table(df, niche, date):
+    """Clean leads as an Arrow snapshot table, with the city taken from each address."""
+    df = df.copy()
+    for column in SNAPSHOT_COLUMNS:
+        if column not in df:
+            df[column] = None
+    df['city'] = df['address'].astype(str).str.extract(CITY_PATTERN, expand=False).str.title()
+    df['niche'] = niche
+    df['date'] = date
+    return pa.Table.from_pandas(df[SNAPSHOT_COLUMNS], schema=snapshot_schema(), preserve_index=False)
+
+
+class LeadSnapshots:
+    """
+    Dated, columnar snapshots of clean leads under root, partitioned by niche
+    and date (root/niche=plumbers/date=2026-10-18/...). Parquet files are
+    compact; feather files are uncompressed Arrow that loads memory-mapped.
+    Each write adds a file, so snapshots of one day accumulate rather than
+    replace each other.
+    """
+
+    def __init__(self, root=SNAPSHOT_DIR, format=SNAPSHOT_FORMAT):
+        if pa is None:
+            raise ImportError("Lead snapshots need pyarrow: pip install pyarrow")
+        if format not in FILE_EXTENSIONS:
+            raise ValueError(f"Unknown snapshot format {format!r}, expected one of {sorted(FILE_EXTENSIONS)}")
+        self.root = root
+        self.format = format
+        self.filesystem = pafs.LocalFileSystem(use_mmap=True)
+        self.partitioning = ds.partitioning(pa.schema([('niche', pa.string()), ('date', pa.string())]),
+                                            flavor='hive')
+
+    def write(self, df, niche, date=None):
+        """Snapshot a niche's clean leads (LeadCleaner.clean_leads output). Returns the number written."""
+        if df.empty:
+            return 0
+        date = date or time.strftime('%Y-%m-%d')
+        table = lead_table(df, niche, date)
+        ds.write_dataset(table, self.root, format='ipc' if self.format == 'feather' else 'parquet',
+                         partitioning=self.partitioning, existing_data_behavior='overwrite_or_ignore',
+                         basename_template=f"{uuid.uuid4().hex}-{{i}}.{FILE_EXTENSIONS[self.format]}")
+        return table.num_rows
+
+    def dataset(self):
+        # Partition values come back dictionary-encoded, like category and city
+        return ds.dataset(self.root, format='ipc' if self.format == 'feather' else 'parquet',
+                          filesystem=self.filesystem,
+                          partitioning=ds.HivePartitioning.discover(infer_dictionary=True),
+                          exclude_invalid_files=True)
+
+    def load(self, niche=None, since=None, until=None, columns=None):
+        """
+        Snapshotted leads as a DataFrame, for one niche and dates from since
+        to until ('YYYY-MM-DD', inclusive) when given. category, city, niche
+        and date load as pandas categoricals.
+        """
+        if not os.path.isdir(self.root):
+            return pd.DataFrame(columns=columns)
+        dataset = self.dataset()
+        conditions = []
+        if niche is not None:
+            conditions.append(ds.field('niche') == niche)
+        if since is not None:
+            conditions.append(ds.field('date') >= since)
+        if until is not None:
+            conditions.append(ds.field('date') <= until)
+        condition = None
+        for clause in conditions:
+            condition = clause if condition is None else condition & clause
+        return dataset.to_table(columns=columns, filter=condition).to_pandas()
+
+    def partitions(self):
+        """(niche, date) of every snapshot partition, sorted."""
+        if not os.path.isdir(self.root):
+            return []
+        keys = (ds.get_partition_keys(fragment.partition_expression) for fragment in self.dataset().get_fragments())
+        return sorted({(key['niche'], key['date']) for key in keys})
+
+
+def snapshot_leads(df, niche, snapshots=None):
+    """
+    Snapshot a niche's clean leads if SNAPSHOT_LEADS is on and pyarrow is
+    installed. A failed snapshot is reported and skipped, never raised.
+    """
+    if not SNAPSHOT_LEADS or not snapshots_available():
+        return 0
+    try:
+        return (snapshots or LeadSnapshots()).write(df, niche)
+    except Exception as e:
+        print(f"Failed to snapshot {niche} leads: {e}")
+        return 0
+
+
+if __name__ == '__main__':
+    if not snapshots_available():
+        print("Lead snapshots need pyarrow: pip install pyarrow")
+    else:
+        snapshots = LeadSnapshots()
+        start = time.perf_counter()
+        df = snapshots.load()
+        print(f"{SNAPSHOT_DIR}: {len(df)} leads in {len(snapshots.partitions())} partitions, "
+              f"loaded in {(time.perf_counter() - start) * 1000:.0f} ms")
@@ -0,0 +1,142 @@
+import unittest
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from unittest.mock import MagicMock, patch
+from scrapers.page_cache import PageCache
+from scrapers.robots_cache import RobotsCache
+
+class TestPageCache(unittest.TestCase):
+
+    def setUp(self):
+        """Create a throwaway cache database."""
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, 'cache.db')
+        self.cache = PageCache(self.path, commit_every=2)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_put_and_get_round_trip(self):
+        """Stored pages come back unchanged and missing URLs return None."""
+        self.cache.put('https://example.com/a', '<html>Ünïcode page</html>')
+        self.assertEqual(self.cache.get('https://example.com/a'), '<html>Ünïcode page</html>')
+        self.assertIsNone(self.cache.get('https://example.com/missing'))
+        self.assertIn('https://example.com/a', self.cache)
+
+    def test_bodies_are_compressed(self):
+        """Page bodies are stored compressed, not as raw text."""
+        text = '<div class="listing">ABC Realty</div>' * 200
+        self.cache.put('https://example.com/big', text)
+        self.cache.flush()
+        size = self.cache.conn.execute('SELECT length(body) FROM pages').fetchone()[0]
+        self.assertLess(size, len(text) // 10)
+
+    def test_writes_are_committed_in_batches(self):
+        """Writes become visible to other readers once a batch is full."""
+        self.cache.put('https://example.com/1', 'one')
+        other = sqlite3.connect(self.path)
+        self.assertEqual(other.execute('SELECT COUNT(*) FROM pages').fetchone()[0], 0)
+        self.cache.put('https://example.com/2', 'two')
+        self.assertEqual(other.execute('SELECT COUNT(*) FROM pages').fetchone()[0], 2)
+        other.close()
+
+    def test_import_legacy_json(self):
+        """A legacy JSON cache is imported page by page."""
+        legacy = os.path.join(self.test_dir, 'scraper_cache.json')
+        with open(legacy, 'w') as f:
+            json.dump({'https://example.com/x': 'x', 'https://example.com/y': 'y'}, f)
+        self.assertEqual(self.cache.import_json(legacy), 2)
+        self.assertEqual(self.cache.get('https://example.com/y'), 'y')
+        self.assertEqual(len(self.cache), 2)
+
+    def test_stale_pages_are_misses(self):
+        """Pages older than the caller's max age are treated as missing."""
+        self.cache.put('https://example.com/old', 'old', fetched_at=time.time() - 50 * 3600)
+        self.assertIsNone(self.cache.get('https://example.com/old', max_age_hours=24))
+        self.assertEqual(self.cache.get('https://example.com/old', max_age_hours=72), 'old')
+        self.assertEqual(self.cache.get('https://example.com/old'), 'old')
+
+    def test_evict_least_recently_used(self):
+        """Eviction drops the least recently accessed pages first."""
+        for name in ['a', 'b', 'c']:
+            self.cache.put(f'https://example.com/{name}', name * 1000)
+        self.cache.conn.execute('UPDATE pages SET accessed_at = 1 WHERE url = ?', ('https://example.com/b',))
+        one_page = self.cache.size_bytes() // 3
+        removed = self.cache.evict(max_bytes=one_page * 2 + 1)
+        self.assertEqual(removed, 1)
+        self.assertNotIn('https://example.com/b', self.cache)
+        self.assertIn('https://example.com/a', self.cache)
+
+    def test_compact_expires_and_evicts(self):
+        """Compaction removes pages too old for any package."""
+        self.cache.put('https://example.com/fresh', 'fresh')
+        self.cache.put('https://example.com/ancient', 'ancient', fetched_at=time.time() - 30 * 86400)
+        result = self.cache.compact()
+        self.assertEqual(result['expired'], 1)
+        self.assertEqual(result['pages'], 1)
+        self.assertIn('https://example.com/fresh', self.cache)
+
+class TestRobotsCache(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.cache = PageCache(os.path.join(self.test_dir, 'cache.db'))
+        response = MagicMock()
+        response.status_code = 200
+        response.text = 'User-agent: *\nCrawl-delay: 5\nDisallow: /private/\n'
+        self.fetch = MagicMock(return_value=response)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_one_fetch_per_host_from_root(self):
+        """robots.txt is fetched once per host, from the host root."""
+        robots = RobotsCache('LeadGenerationBot/1.0', conn=self.cache.conn, fetch=self.fetch)
+        self.assertTrue(robots.can_fetch('https://example.com/agents/search?sp=s%3DSouth+Africa'))
+        self.assertTrue(robots.can_fetch('https://example.com/agents/search?page=2'))
+        self.assertFalse(robots.can_fetch('https://example.com/private/page'))
+        self.fetch.assert_called_once_with('https://example.com/robots.txt')
+
+    def test_crawl_delay(self):
+        """Crawl-delay for our user agent is exposed in seconds."""
+        robots = RobotsCache('LeadGenerationBot/1.0', fetch=self.fetch)
+        self.assertEqual(robots.crawl_delay('https://example.com/any'), 5.0)
+
+    def test_rules_persist_across_instances(self):
+        """A second cache on the same database does not refetch robots.txt."""
+        RobotsCache('LeadGenerationBot/1.0', conn=self.cache.conn, fetch=self.fetch).can_fetch('https://example.com/')
+        fresh_fetch = MagicMock()
+        robots = RobotsCache('LeadGenerationBot/1.0', conn=self.cache.conn, fetch=fresh_fetch)
+        self.assertFalse(robots.can_fetch('https://example.com/private/x'))
+        fresh_fetch.assert_not_called()
+
+    def test_failed_fetch_is_negatively_cached(self):
+        """An unreachable robots.txt allows crawling and is not retried immediately."""
+        failing = MagicMock(side_effect=ConnectionError('down'))
+        robots = RobotsCache('LeadGenerationBot/1.0', fetch=failing)
+        self.assertTrue(robots.can_fetch('https://down.example.com/a'))
+        self.assertTrue(robots.can_fetch('https://down.example.com/b'))
+        self.assertEqual(failing.call_count, 1)
+
+    def test_server_error_disallows_until_rechecked(self):
+        """A 5xx robots.txt blocks the host for the negative TTL, then is fetched again."""
+        self.fetch.return_value.status_code = 503
+        robots = RobotsCache('LeadGenerationBot/1.0', conn=self.cache.conn, fetch=self.fetch, negative_ttl_hours=1)
+        self.assertFalse(robots.can_fetch('https://busy.example.com/agents'))
+        self.assertFalse(RobotsCache('LeadGenerationBot/1.0', conn=self.cache.conn,
+                                     fetch=self.fetch).can_fetch('https://busy.example.com/agents'))
+        self.assertEqual(self.fetch.call_count, 1)
+
+        self.fetch.return_value.status_code = 200
+        with patch('time.time', return_value=time.time() + 3601):
+            self.assertTrue(robots.can_fetch('https://busy.example.com/agents'))
+        self.assertEqual(self.fetch.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import pandas as pd
+from cleaner.cleaner import LeadCleaner
+from pipeline import LeadPipeline, TopKSink, batched
+
+def make_leads(n):
+    leads = []
+    for i in range(n):
+        leads.append({
+            'name': f'Agency {i % (n // 2)}',  # Every name appears twice
+            'phone': f'021 555 {i % (n // 2):04d}' if i % 3 else 'N/A',
+            'address': 'Long St, Cape Town' if i % 4 else 'N/A',
+            'category': 'real_estate_agents',
+            'niche': 'real_estate_agents',
+            'source': 'Property24' if i % 2 else 'Gumtree Property',
+        })
+    return leads
+
+class TestLeadPipeline(unittest.TestCase):
+
+    def test_batched(self):
+        self.assertEqual(list(batched(range(5), 2)), [[0, 1], [2, 3], [4]])
+
+    def test_streaming_matches_clean_leads(self):
+        """With exact dedupe, streaming cleaning keeps and scores the same leads as clean_leads."""
+        leads = make_leads(200)
+        sink = TopKSink(1000)
+        LeadPipeline(LeadCleaner(fuzzy_dedupe=False), batch_size=7).run(iter(leads), [sink])
+        streamed = sink.to_frame()
+        expected = LeadCleaner(fuzzy_dedupe=False).clean_leads(pd.DataFrame(leads))
+        columns = ['name', 'phone', 'address', 'score']
+        self.assertEqual(sorted(map(tuple, streamed[columns].values)), sorted(map(tuple, expected[columns].values)))
+        self.assertEqual(list(streamed['id']), list(range(1, len(streamed) + 1)))
+        self.assertTrue(streamed['score'].is_monotonic_decreasing)
+
+    def test_top_k_keeps_best_scores(self):
+        """The sink holds at most k leads and keeps the highest scores."""
+        sink = TopKSink(3)
+        sink.write([{'name': f'L{i}', 'score': score} for i, score in enumerate([0, 55, 30, 55, 25, 0])])
+        self.assertEqual([row['name'] for row in sink.rows()], ['L1', 'L3', 'L2'])
+
+    def test_limit_and_yield_counts(self):
+        """A limit stops pulling raw leads, and per-source counts are tracked."""
+        pulled = []
+
+        def source():
+            for lead in make_leads(200):
+                pulled.append(lead)
+                yield lead
+
+        pipeline = LeadPipeline(batch_size=10)
+        self.assertEqual(pipeline.run(source(), [TopKSink(5)], limit=5), 5)
+        self.assertLess(len(pulled), 200)
+        self.assertEqual(sum(pipeline.raw_counts.values()), len(pulled))
+        self.assertEqual(sum(pipeline.kept_counts.values()), 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import unittest
+import csv
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+import openpyxl
+import pandas as pd
+from reports.export_data import export_leads
+from reports.generate_excel import LeadReportExcel, export_store
+from reports.generate_pdf import LeadReportPDF, clean_column, clean_text, lead_table_rows, lead_tables
+from store.lead_store import LeadStore
+
+class TestExcelExport(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.df = pd.DataFrame([
+            {'name': 'ABC Realty', 'phone': '+27 21 123 4567', 'address': '12 Long St, Cape Town',
+             'category': 'real_estate_agents', 'score': 60, 'id': 1},
+            {'name': 'XYZ Properties', 'phone': 'N/A', 'address': 'Sandton, GAUTENG',
+             'category': 'real_estate_agents', 'score': 30, 'id': 2},
+            {'name': 'Seaside Homes', 'phone': '+27 31 555 0000', 'address': 'N/A',
+             'category': 'real_estate_agents', 'score': 20, 'id': 3},
+        ])
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def read(self, filename):
+        workbook = openpyxl.load_workbook(filename, read_only=True)
+        try:
+            return {sheet.title: list(sheet.iter_rows(values_only=True)) for sheet in workbook.worksheets}
+        finally:
+            workbook.close()
+
+    def test_generate_writes_numbers_as_numbers(self):
+        filename = LeadReportExcel(self.df, 'premium').generate(os.path.join(self.test_dir, 'leads.xlsx'))
+        sheets = self.read(filename)
+
+        self.assertEqual(list(sheets), ['Business Leads', 'Analytics'])
+        self.assertEqual(sheets['Business Leads'][0], ('ID', 'Business Name', 'Phone', 'Address', 'Category', 'Score'))
+        self.assertEqual(sheets['Business Leads'][1],
+                         (1, 'ABC Realty', '+27 21 123 4567', '12 Long St, Cape Town', 'real_estate_agents', 60))
+        self.assertEqual(len(sheets['Business Leads']), 4)
+
+    def test_missing_columns_get_defaults(self):
+        filename = LeadReportExcel(self.df[['name']], 'basic').generate(os.path.join(self.test_dir, 'leads.xlsx'))
+        self.assertEqual(self.read(filename)['Business Leads'][1], ('N/A', 'ABC Realty', 'N/A', 'N/A', 'N/A', 0))
+
+    def test_export_store_streams_onto_extra_sheets(self):
+        store = LeadStore(os.path.join(self.test_dir, 'leads.db'), batch_size=2)
+        try:
+            store.upsert(self.df.drop(columns='id').to_dict('records'), niche='real_estate_agents')
+            with patch('reports.generate_excel.MAX_SHEET_ROWS', 2):
+                filename = export_store(store, os.path.join(self.test_dir, 'store.xlsx'), niche='real_estate_agents')
+        finally:
+            store.close()
+        sheets = self.read(filename)
+
+        self.assertEqual(list(sheets), ['Business Leads', 'Business Leads 2'])
+        self.assertEqual([row[:2] for row in sheets['Business Leads'][1:]], [(1, 'ABC Realty'), (2, 'XYZ Properties')])
+        self.assertEqual(sheets['Business Leads 2'][1], (3, 'Seaside Homes', '+27 31 555 0000', 'N/A',
+                                                         'real_estate_agents', 20))
+
+class TestPDFReport(unittest.TestCase):
+
+    def test_clean_column_matches_clean_text(self):
+        values = pd.Series(['Café – “Best” Plumbing…', '  Ŝtreet  ', '北京', '', None, float('nan'), 0, 42, 'N/A'])
+        self.assertEqual(list(clean_column(values, 10)), [clean_text(value)[:10] for value in values])
+        self.assertEqual(clean_text('Café – “Best”…'), 'Cafe - "Best"...')
+
+    def test_leads_are_split_into_page_tables(self):
+        rows = [[str(i), f'Business {i}', 'N/A', 'N/A', 'plumbers'] for i in range(1, 71)]
+        tables = lead_tables(rows, rows_per_table=30)
+
+        self.assertEqual([len(table._cellvalues) for table in tables], [31, 30, 10])
+        self.assertEqual(tables[0]._cellvalues[1][0], '1')
+        self.assertEqual(tables[2]._cellvalues[-1][0], '70')
+        self.assertEqual(len(lead_tables(rows, rows_per_table=0)), 1)
+
+    def test_generate_renders_large_orders(self):
+        df = pd.DataFrame({'id': range(1, 301), 'name': 'Café Plumbing', 'phone': '+27 21 123 4567',
+                           'address': 'Cape Town', 'category': 'plumbers', 'score': 30})
+        test_dir = tempfile.mkdtemp()
+        try:
+            report = LeadReportPDF(df, 'premium')
+            report.leads = df
+            filename = report.generate(os.path.join(test_dir, 'report.pdf'))
+            self.assertGreater(os.path.getsize(filename), 0)
+        finally:
+            shutil.rmtree(test_dir)
+
+    def test_generate_renders_no_leads(self):
+        """clean_leads returns a frame without columns when there are no leads."""
+        self.assertEqual(lead_table_rows(pd.DataFrame()), [])
+        test_dir = tempfile.mkdtemp()
+        try:
+            filename = LeadReportPDF(pd.DataFrame(), 'standard').generate(os.path.join(test_dir, 'report.pdf'))
+            self.assertGreater(os.path.getsize(filename), 0)
+        finally:
+            shutil.rmtree(test_dir)
+
+class TestDataExport(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.leads = [
+            {'name': 'ABC Realty', 'phone': '+27 21 123 4567', 'address': '12 Long St, Cape Town',
+             'category': 'real_estate_agents', 'score': 60},
+            {'name': 'Café Homes', 'phone': 'N/A', 'address': 'Sandton, GAUTENG', 'category': None, 'score': 30},
+            {'name': 'Seaside Homes', 'address': 'Durban', 'category': 'real_estate_agents', 'score': 20},
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_csv_export_in_chunks(self):
+        filename = os.path.join(self.test_dir, 'leads.csv')
+        self.assertEqual(export_leads(iter(self.leads), filename, chunk_size=2), 3)
+        with open(filename, newline='', encoding='utf-8') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], ['ID', 'Business Name', 'Phone', 'Address', 'Category', 'Score'])
+        self.assertEqual(rows[2], ['2', 'Café Homes', 'N/A', 'Sandton, GAUTENG', 'N/A', '30'])
+        self.assertEqual(rows[3][:3], ['3', 'Seaside Homes', 'N/A'])
+
+    def test_jsonl_export_with_projection(self):
+        filename = os.path.join(self.test_dir, 'leads.jsonl.gz')
+        export_leads(self.leads, filename, columns=['Business Name', 'Score'])
+        with gzip.open(filename, 'rt', encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(rows, [{'Business Name': 'ABC Realty', 'Score': 60}, {'Business Name': 'Café Homes', 'Score': 30},
+                                {'Business Name': 'Seaside Homes', 'Score': 20}])
+
+    def test_bad_requests_write_nothing(self):
+        with self.assertRaises(ValueError):
+            export_leads(self.leads, os.path.join(self.test_dir, 'leads.xml'))
+        with self.assertRaises(ValueError):
+            export_leads(self.leads, os.path.join(self.test_dir, 'leads.csv'), columns=['Email'])
+
+        def failing():
+            yield self.leads[0]
+            raise IOError('store closed')
+        with self.assertRaises(IOError):
+            export_leads(failing(), os.path.join(self.test_dir, 'leads.csv'))
+        self.assertEqual(os.listdir(self.test_dir), [])
+
+if __name__ == '__main__':
+    unittest.main()
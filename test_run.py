@@ -1,10 +1,26 @@
 import unittest
+import gzip
+import io
+import json
+import multiprocessing
+from contextlib import redirect_stderr
+from concurrent.futures import ProcessPoolExecutor
 from unittest.mock import patch, MagicMock
 import pandas as pd
 import os
 import tempfile
 import shutil
+import time
+import run
+from config import NICHE_SOURCES, PACKAGE_FRESHNESS_HOURS, PACKAGE_LEADS
+from scrapers.frontier import BLOCKED, DONE
 from scrapers.scraper import LeadScraper
+from store.lead_store import LeadStore
+
+def write_report(filename):
+    """Stands in for a mocked report generator's generate, leaving an empty file."""
+    open(filename, 'w').close()
+    return filename
 
 class TestLeadGeneration(unittest.TestCase):
 
@@ -219,5 +235,289 @@ class TestLeadGeneration(unittest.TestCase):
             self.assertIn('XYZ Properties', df['name'].values)
             self.assertIn('DEF Estates', df['name'].values)
 
+class TestReadThroughPackages(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        self.reports = [patch('run.LeadReportPDF'), patch('run.LeadReportExcel')]
+        for report in self.reports:
+            report.start().return_value.generate.side_effect = write_report
+
+    def tearDown(self):
+        for report in self.reports:
+            report.stop()
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def store_leads(self, count, source, hours_ago):
+        store = LeadStore()
+        leads = [{'name': f'Agency {source} {i}', 'phone': f'021 555 {i:04d}', 'address': 'Cape Town',
+                  'category': 'real_estate_agents', 'score': 55, 'source': source} for i in range(count)]
+        store.upsert(leads, niche='real_estate_agents', seen_at=time.time() - hours_ago * 3600)
+        store.close()
+
+    def test_fresh_store_serves_without_scraping(self):
+        self.store_leads(60, 'Property24', hours_ago=1)
+        with patch.object(LeadScraper, 'iter_leads') as mock_iter:
+            run.generate_lead_package('real_estate_agents', 'basic')
+        mock_iter.assert_not_called()
+        df = run.LeadReportPDF.call_args[0][0]
+        self.assertEqual(len(df), 50)
+
+    def test_only_stale_sources_are_scraped(self):
+        """A shortfall crawls only sources not crawled through, and the new leads are stored."""
+        self.store_leads(20, 'Property24', hours_ago=1)
+        self.store_leads(20, 'Private Property', hours_ago=100)
+        scraper = LeadScraper()
+        for page in range(1, run.PACKAGE_MAX_PAGES + 1):
+            scraper.frontier.record(f'https://www.property24.com/?page={page}', 'real_estate_agents', 'Property24',
+                                    page, DONE)
+        scraper.frontier.checkpoint()
+        scraper.close()
+        new_leads = [{'name': f'New Agency {i}', 'phone': f'031 555 {i:04d}', 'address': 'Durban',
+                      'category': 'real_estate_agents', 'niche': 'real_estate_agents', 'source': 'Gumtree Property'}
+                     for i in range(40)]
+        with patch.object(LeadScraper, 'iter_leads', return_value=(lead for lead in new_leads)) as mock_iter:
+            run.generate_lead_package('real_estate_agents', 'basic')
+        self.assertEqual(mock_iter.call_args.kwargs['sources'], ['Private Property', 'Gumtree Property'])
+        self.assertEqual(mock_iter.call_args.kwargs['target_count'], 50)
+        self.assertTrue(mock_iter.call_args.kwargs['resume'])
+        df = run.LeadReportPDF.call_args[0][0]
+        self.assertEqual(len(df), 50)
+
+    @staticmethod
+    def listings(url, headers=None):
+        """15 agencies on each page of every source."""
+        response = MagicMock(status_code=200, headers={})
+        page = int(url.rsplit('=', 1)[-1]) if '&page=' in url else 1
+        host = url.split('/')[2]
+        response.text = '' if url.endswith('/robots.txt') else ''.join(
+            f'<div class="listing">{host} Agency {page}-{i}, 12 Long St Cape Town, '
+            f'021 {page}{i:02d} {len(host):04d}</div>' for i in range(15))
+        return response
+
+    def test_larger_package_continues_a_partial_crawl(self):
+        """A premium sale after a basic one crawls on past the pages the basic crawl stopped at."""
+        self.reports[0].stop()
+        self.reports[0] = patch('run.LeadReportPDF')
+        self.reports[0].start().return_value.generate.side_effect = write_report
+        with patch.object(LeadScraper, '_get', side_effect=self.listings), patch('time.sleep'), \
+                patch('cleaner.cleaner.FUZZY_DEDUPE', False):
+            run.generate_lead_package('real_estate_agents', 'basic')
+            self.assertEqual(len(run.LeadReportPDF.call_args[0][0]), PACKAGE_LEADS['basic'])
+            store = LeadStore()
+            self.assertLess(store.count('real_estate_agents'), PACKAGE_LEADS['premium'])
+            store.close()
+
+            run.generate_lead_package('real_estate_agents', 'premium')
+        self.assertEqual(len(run.LeadReportPDF.call_args[0][0]), PACKAGE_LEADS['premium'])
+
+    def test_robots_blocks_expire_with_the_negative_ttl(self):
+        """A source blocked by a robots.txt error is crawled again once the robots cache would recheck it."""
+        scraper = LeadScraper()
+        for page in range(1, run.PACKAGE_MAX_PAGES + 1):
+            scraper.frontier.record(f'https://www.property24.com/?page={page}', 'real_estate_agents', 'Property24',
+                                    page, BLOCKED)
+            scraper.frontier.record(f'https://www.privateproperty.co.za/?page={page}', 'real_estate_agents',
+                                    'Private Property', page, BLOCKED, fetched_at=time.time() - 2 * 3600)
+        try:
+            self.assertEqual(run.stale_sources('real_estate_agents', scraper, 72),
+                             ['Private Property', 'Gumtree Property'])
+        finally:
+            scraper.close()
+
+    def test_old_cached_pages_are_not_fresh_leads(self):
+        """Leads parsed from a 70h-old cached page are 70h old: they serve a basic sale, not a premium one."""
+        scraper = LeadScraper()
+        for source in NICHE_SOURCES['real_estate_agents']:
+            base_url = scraper.source_url(source, 'real_estate_agents')
+            for page in range(1, run.PACKAGE_MAX_PAGES + 1):
+                url = f"{base_url}&page={page}" if page > 1 else base_url
+                scraper.cache.put(url, self.listings(url).text, fetched_at=time.time() - 70 * 3600)
+        scraper.close()
+
+        with patch.object(LeadScraper, '_get', side_effect=self.listings) as mock_get, patch('time.sleep'), \
+                patch('cleaner.cleaner.FUZZY_DEDUPE', False):
+            run.generate_lead_package('real_estate_agents', 'basic')
+            mock_get.assert_not_called()
+            store = LeadStore()
+            self.assertGreaterEqual(store.count('real_estate_agents', PACKAGE_FRESHNESS_HOURS['basic']),
+                                    PACKAGE_LEADS['basic'])
+            self.assertEqual(store.count('real_estate_agents', PACKAGE_FRESHNESS_HOURS['premium']), 0)
+
+            # The premium sale fetches the pages again rather than replaying the old ones
+            run.generate_lead_package('real_estate_agents', 'premium')
+            self.assertTrue(mock_get.called)
+            self.assertGreaterEqual(store.count('real_estate_agents', PACKAGE_FRESHNESS_HOURS['premium']),
+                                    PACKAGE_LEADS['premium'])
+            store.close()
+
+    def test_force_refresh_scrapes_every_source(self):
+        self.store_leads(60, 'Property24', hours_ago=1)
+        with patch.object(LeadScraper, 'iter_leads', return_value=(lead for lead in [])) as mock_iter:
+            run.generate_lead_package('real_estate_agents', 'basic', force_refresh=True)
+        self.assertIsNone(mock_iter.call_args.kwargs['sources'])
+
+    @patch('builtins.input', side_effect=['1', 'real_estate_agents', 'basic'])
+    def test_force_refresh_flag(self, mock_input):
+        with patch('run.generate_lead_package') as mock_generate:
+            run.main(['--force-refresh'])
+        mock_generate.assert_called_once_with('real_estate_agents', 'basic', force_refresh=True)
+
+class TestBatchCommand(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        store = LeadStore()
+        for niche in ['real_estate_agents', 'tutors_education']:
+            leads = [{'name': f'{niche} {i}', 'phone': f'021 555 {i:04d}', 'address': 'Cape Town',
+                      'category': niche, 'score': 55, 'source': 'Directory'} for i in range(200)]
+            store.upsert(leads, niche=niche)
+        store.close()
+
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def test_batch_builds_every_combination_from_one_crawl(self):
+        argv = ['batch', '--niches', 'real_estate_agents', 'tutors_education', '--packages', 'basic', 'standard']
+        with patch.object(LeadScraper, 'iter_leads') as mock_iter, \
+                patch('run.LeadReportPDF') as mock_pdf, patch('run.LeadReportExcel') as mock_excel:
+            mock_pdf.return_value.generate.side_effect = write_report
+            mock_excel.return_value.generate.side_effect = write_report
+            self.assertEqual(run.main(argv), 0)
+        mock_iter.assert_not_called()
+        self.assertEqual(mock_pdf.call_count, 4)
+        self.assertEqual(mock_excel.call_count, 2)
+        sizes = sorted((call.args[1], len(call.args[0])) for call in mock_pdf.call_args_list)
+        self.assertEqual(sizes, [('basic', PACKAGE_LEADS['basic'])] * 2 + [('standard', PACKAGE_LEADS['standard'])] * 2)
+        filenames = sorted(call.args[0] for call in mock_pdf.return_value.generate.call_args_list)
+        self.assertTrue(filenames[0].startswith('reports/real_estate_agents_basic_'))
+
+    def test_batch_exits_non_zero_on_failure(self):
+        with patch('run.LeadReportPDF') as mock_pdf, patch('run.LeadReportExcel') as mock_excel:
+            mock_pdf.return_value.generate.side_effect = write_report
+            mock_excel.return_value.generate.side_effect = IOError('disk full')
+            self.assertEqual(run.main(['batch', '--niches', 'tutors_education', '--packages', 'basic', 'premium']), 1)
+
+    def test_export_command_streams_the_store(self):
+        argv = ['export', '--niche', 'tutors_education', '--format', 'jsonl', '--columns', 'ID', 'Business Name',
+                '--output', 'tutors.jsonl.gz']
+        self.assertEqual(run.main(argv), 0)
+        with gzip.open('tutors.jsonl.gz', 'rt') as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(len(rows), 200)
+        self.assertEqual(rows[0], {'ID': 1, 'Business Name': 'tutors_education 0'})
+
+    def test_export_format_must_match_the_output(self):
+        for argv in (['export', '--format', 'jsonl', '--output', 'leads.csv'], ['export', '--output', 'leads.jsonl']):
+            with self.assertRaises(SystemExit) as exit, redirect_stderr(io.StringIO()):
+                run.main(argv)
+            self.assertEqual(exit.exception.code, 2)
+        self.assertEqual(os.listdir('.'), ['leads.db'])
+
+        self.assertEqual(run.main(['export', '--niche', 'tutors_education', '--output', 'tutors.jsonl.gz']), 0)
+        with gzip.open('tutors.jsonl.gz', 'rt') as f:
+            self.assertEqual(len(f.readlines()), 200)
+
+class TestReportReuse(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        self.df = pd.DataFrame({'id': range(1, 41), 'name': [f'Plumber {i}' for i in range(40)],
+                                'phone': '+27 21 123 4567', 'address': 'Cape Town', 'category': 'plumbers',
+                                'score': 30, 'last_seen': time.time()})
+
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def test_unchanged_leads_reuse_reports(self):
+        files = run.build_package_files(self.df, 'standard', 'plumbers')
+        self.assertEqual(len(files), 2)
+        seen_later = self.df.assign(last_seen=time.time() + 60)
+        with patch('run.LeadReportPDF') as mock_pdf, patch('run.LeadReportExcel') as mock_excel:
+            self.assertEqual(run.build_package_files(seen_later, 'standard', 'plumbers'), files)
+        mock_pdf.assert_not_called()
+        mock_excel.assert_not_called()
+
+        changed = self.df.copy()
+        changed.loc[0, 'phone'] = '+27 21 765 4321'
+        self.assertNotEqual(run.report_key(changed, 'standard'), run.report_key(self.df, 'standard'))
+        self.assertNotEqual(run.report_key(self.df, 'premium'), run.report_key(self.df, 'standard'))
+        key = run.report_key(self.df, 'standard')
+        with patch('run.REPORT_TEMPLATE_VERSION', run.REPORT_TEMPLATE_VERSION + 1):
+            self.assertNotEqual(run.report_key(self.df, 'standard'), key)
+
+    def test_failed_render_leaves_no_file(self):
+        with patch('run.LeadReportExcel') as mock_excel:
+            mock_excel.return_value.generate.side_effect = IOError('disk full')
+            with self.assertRaises(IOError):
+                run.build_package_files(self.df, 'standard', 'plumbers')
+        self.assertEqual(os.listdir('exports'), [])
+        self.assertEqual(len(os.listdir('reports')), 1)
+
+    def test_reports_render_in_worker_processes(self):
+        pool = ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context('spawn'))
+        try:
+            files = run.build_package_files(self.df, 'premium', 'plumbers', pool=pool)
+        finally:
+            pool.shutdown(wait=True)
+        for label, filename in (file.split(': ') for file in files):
+            self.assertGreater(os.path.getsize(filename), 0)
+        self.assertEqual(len(os.listdir('reports')) + len(os.listdir('exports')), 2)
+
+class TestDailyUpdate(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.test_dir)
+
+    @staticmethod
+    def page(url, headers=None):
+        response = MagicMock(status_code=200, headers={})
+        number = url.rsplit('=', 1)[-1] if '&page=' in url else '1'
+        response.text = '' if url.endswith('/robots.txt') else f'''
+            <div class="listing">{url.split('/')[2]} Agency {number}, 12 Long St, Cape Town, 021 555 000{number}</div>
+        '''
+        return response
+
+    def test_niches_share_one_scraper_and_are_summarized(self):
+        with patch.object(LeadScraper, '_get', side_effect=self.page), \
+                patch('run.LeadScraper', wraps=LeadScraper) as mock_scraper, \
+                patch('time.sleep'):
+            summary = run.automated_daily_update(['real_estate_agents', 'tutors_education'])
+        self.assertEqual(mock_scraper.call_count, 1)
+        self.assertEqual([row['niche'] for row in summary], ['real_estate_agents', 'tutors_education'])
+        # Two pages from each of three and two sources
+        self.assertEqual([row['raw'] for row in summary], [6, 4])
+        self.assertEqual([row['status'] for row in summary], ['ok', 'ok'])
+        store = LeadStore()
+        self.assertEqual(store.count('real_estate_agents'), summary[0]['saved'])
+        store.close()
+
+    def test_daily_command_exits_non_zero_on_failure(self):
+        with patch.object(LeadScraper, '_get', side_effect=self.page), patch('time.sleep'):
+            self.assertEqual(run.main(['daily', '--niches', 'tutors_education']), 0)
+        with patch('run.refresh_for_daily_update', side_effect=RuntimeError('blocked')):
+            self.assertEqual(run.main(['daily', '--niches', 'tutors_education']), 1)
+
+    def test_deadline_stops_crawling(self):
+        with patch.object(LeadScraper, '_get', side_effect=self.page) as mock_get:
+            summary = run.automated_daily_update(['real_estate_agents'], deadline_minutes=0)
+        mock_get.assert_not_called()
+        self.assertEqual(summary[0]['status'], 'deadline')
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import os
+import shutil
+import tempfile
+from unittest.mock import MagicMock, patch
+import pandas as pd
+from cleaner.cleaner import LeadCleaner
+from scheduler import RefreshScheduler, niche_sla_hours
+from store.lead_store import LeadStore
+
+NOW = 1_000_000.0
+YIELDS = {'Property24': 0.5, 'Private Property': 0.8, 'Gumtree Property': 0.3}
+
+
+class TestRefreshScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.store = LeadStore(os.path.join(self.test_dir, 'leads.db'))
+        # Property24 was refreshed 20 hours ago; the other sources never were
+        self.store.upsert([self.lead('Property24', 0)], niche='real_estate_agents', seen_at=NOW - 20 * 3600)
+        self.scraper = MagicMock()
+        self.scraper.yield_stats.yield_ratio.side_effect = YIELDS.get
+        self.scraper.scrape_leads.side_effect = self.scrape
+        self.crawled = []
+        self.snapshots = patch('scheduler.snapshot_leads')
+        self.snapshots.start()
+
+    def tearDown(self):
+        self.snapshots.stop()
+        self.store.close()
+        shutil.rmtree(self.test_dir)
+
+    @staticmethod
+    def lead(source, i):
+        return {'name': f'{source} Agent {i}', 'phone': f'021 555 {i:04d}', 'address': '12 Long St, Cape Town',
+                'category': 'real_estate_agents', 'niche': 'real_estate_agents', 'source': source}
+
+    def scrape(self, niche, max_pages, sources, resume):
+        self.crawled.append(sources[0])
+        return pd.DataFrame([self.lead(sources[0], i) for i in range(3)])
+
+    def scheduler(self, **kwargs):
+        scheduler = RefreshScheduler(['real_estate_agents'], scraper=self.scraper, store=self.store,
+                                     cleaner=LeadCleaner(fuzzy_dedupe=False), margin_hours=2, **kwargs)
+        scheduler.clock = lambda: NOW
+        return scheduler
+
+    def test_runs_due_sources_best_yield_first(self):
+        """Overdue sources run highest yield first; a fresh source waits until just before its SLA."""
+        scheduler = self.scheduler(pages_per_task=2, pages_per_hour=60)
+        wake = scheduler.run_pending()
+
+        self.assertEqual(self.crawled, ['Private Property', 'Gumtree Property'])
+        self.assertEqual(wake, NOW + 2 * 3600)  # Property24: 24h SLA less 2h margin after its last lead
+        self.assertEqual(self.store.count('real_estate_agents'), 7)
+        self.assertEqual(len(scheduler), 3)
+        self.scraper.scrape_leads.assert_called_with('real_estate_agents', max_pages=2, sources=['Gumtree Property'],
+                                                     resume=True)
+        self.scraper.record_yield.assert_called_with({'Gumtree Property': 3}, {'Gumtree Property': 3})
+
+    def test_defers_tasks_beyond_the_hourly_budget(self):
+        scheduler = self.scheduler(pages_per_task=2, pages_per_hour=2)
+        self.assertEqual(scheduler.run_pending(), NOW + 3600)
+        self.assertEqual(self.crawled, ['Private Property'])
+
+        scheduler.clock = lambda: NOW + 3600
+        scheduler.run_pending()
+        self.assertEqual(self.crawled, ['Private Property', 'Gumtree Property'])
+
+    def test_failed_refresh_is_retried_later(self):
+        self.scraper.scrape_leads.side_effect = RuntimeError('blocked')
+        scheduler = self.scheduler(pages_per_task=2, pages_per_hour=60)
+        scheduler.run_pending()
+        self.assertEqual(scheduler.next_due(), NOW + 3600)
+
+    def test_sla_follows_packages_sold(self):
+        self.assertEqual(niche_sla_hours('real_estate_agents'), 24)
+        with patch('scheduler.SCHEDULE_PACKAGES', {'real_estate_agents': ['basic', 'standard']}):
+            self.assertEqual(niche_sla_hours('real_estate_agents'), 48)
+
+if __name__ == '__main__':
+    unittest.main()
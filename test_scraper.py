@@ -0,0 +1,310 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config import RATE_LIMIT_SECONDS
+from scrapers.extract import extract_lead_text, find_phone
+from scrapers.parse_pool import ParsePool, extract_page
+from scrapers.parsing import candidate_listings, find_listings
+from scrapers.scraper import LeadScraper
+from scrapers.session import CrawlSession
+from scrapers.throttle import HostThrottle
+
+LISTING_PAGE = '''
+<html>
+<body>
+    <div class="agent-listing">ABC Realty, 12 Long St, Cape Town 8001, 021 123 4567</div>
+    <div class="agent-listing">XYZ Properties, 45 Main Rd, Johannesburg, 011 987 6543</div>
+    <div class="agent-listing">Seaside Homes, Umhlanga, Durban 4320</div>
+</body>
+</html>
+'''
+
+def page_response(url, headers=None):
+    response = MagicMock()
+    response.status_code = 404 if url.endswith('/robots.txt') else 200
+    response.text = '' if url.endswith('/robots.txt') else LISTING_PAGE
+    response.headers = {}
+    return response
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Serves 200s over keep-alive connections, but answers /flaky with one 503 first."""
+    protocol_version = 'HTTP/1.1'
+    failures = {}
+
+    def do_GET(self):
+        if self.path == '/flaky' and not FlakyHandler.failures.get(self.path):
+            FlakyHandler.failures[self.path] = True
+            body, status = b'busy', 503
+        else:
+            body, status = b'ok', 200
+        self.send_response(status)
+        if status == 503:
+            self.send_header('Retry-After', '0')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class TestCrawlSession(unittest.TestCase):
+
+    def setUp(self):
+        FlakyHandler.failures = {}
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyHandler)
+        threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.session = CrawlSession({'User-Agent': 'LeadGenerationBot/1.0'})
+
+    def tearDown(self):
+        self.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connections_are_reused(self):
+        """Sequential requests to one host share a kept-alive connection."""
+        for page in range(3):
+            self.assertEqual(self.session.get(f"{self.base}/page{page}").status_code, 200)
+        stats = self.session.stats()
+        self.assertEqual(stats['connections_opened'], 1)
+        self.assertEqual(stats['connections_reused'], 2)
+
+    def test_retries_transient_errors(self):
+        """A 503 with Retry-After is retried and counted."""
+        response = self.session.get(f"{self.base}/flaky")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.session.stats()['retries'], 1)
+
+    def test_retries_wait_for_the_host(self):
+        """Every retry goes through the wait hook, after the backoff."""
+        waits = []
+        response = self.session.get(f"{self.base}/flaky", wait=lambda: waits.append(self.session.retries))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(waits), 1)
+
+    def test_retry_after_http_date(self):
+        """Retry-After given as an HTTP date is converted to seconds."""
+        response = MagicMock()
+        response.headers = {'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'}
+        self.assertEqual(CrawlSession.retry_after(response), 0)
+        response.headers = {'Retry-After': '7'}
+        self.assertEqual(CrawlSession.retry_after(response), 7)
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'fixtures')
+
+class TestParsing(unittest.TestCase):
+
+    def test_fixture_pages_use_the_right_selector(self):
+        """Each saved page resolves to its listing kind through the fallback chain."""
+        for page, tag in [('div_listings', 'div'), ('li_listings', 'li'), ('profile_links', 'a')]:
+            with open(os.path.join(FIXTURES, page + '.html'), encoding='utf-8') as f:
+                listings = find_listings(f.read())
+            self.assertEqual(len(listings), 30, page)
+            self.assertTrue(all(listing.name == tag for listing in listings), page)
+
+    def test_html_parser_backend(self):
+        """The stdlib parser gives the same listings when lxml is unavailable."""
+        listings = find_listings(LISTING_PAGE, parser='html.parser')
+        self.assertEqual([l.get_text() for l in listings], [l.get_text() for l in find_listings(LISTING_PAGE)])
+
+    def test_preferred_selector_is_tried_first(self):
+        """A learned selector is used directly, falling back to the usual order if it misses."""
+        with open(os.path.join(FIXTURES, 'li_listings.html'), encoding='utf-8') as f:
+            html = f.read()
+        self.assertEqual([name for name, _ in candidate_listings(html, preferred='li')][:1], ['li'])
+        self.assertEqual([name for name, _ in candidate_listings(html, preferred='div')], ['li'])
+
+class TestExtraction(unittest.TestCase):
+
+    def test_matches_original_extraction(self):
+        """The precompiled engine returns exactly what the inline-regex version did."""
+        from benchmarks.bench_extract import corpus, legacy_extract_lead
+        for text in corpus():
+            self.assertEqual(extract_lead_text(text, 'plumbers'), legacy_extract_lead(text, 'plumbers'), text)
+
+    def test_phone_format_priority_beats_position(self):
+        """An earlier phone format wins even when a later format appears first in the text."""
+        self.assertEqual(find_phone('+27 1 234 567 890 or 011-123-4567'), '011-123-4567')
+        self.assertEqual(find_phone('27 123 4567 then 0821234567'), '0821234567')
+        self.assertEqual(find_phone('call 27 123 4567'), '27 123 4567')
+        self.assertIsNone(find_phone('no number here'))
+
+    def test_parse_pool_matches_inline_parsing(self):
+        """Worker processes return the same leads, in page order or as they finish."""
+        pages = []
+        for page in ['div_listings', 'li_listings', 'profile_links']:
+            with open(os.path.join(FIXTURES, page + '.html'), encoding='utf-8') as f:
+                pages.append(f.read())
+        inline = [extract_page(html, 'plumbers') for html in pages]
+        for ordered in [True, False]:
+            pool = ParsePool(workers=2, ordered=ordered)
+            try:
+                results = list(pool.map(pages, 'plumbers'))
+            finally:
+                pool.close()
+            if ordered:
+                self.assertEqual(results, inline)
+            else:
+                self.assertCountEqual(results, inline)
+
+class TestHostThrottle(unittest.TestCase):
+
+    def test_hosts_are_throttled_independently(self):
+        """Different hosts never wait on each other; the same host waits its delay."""
+        throttle = HostThrottle()
+        self.assertEqual(throttle.acquire('https://a.example.com', 0.2), 0)
+        self.assertEqual(throttle.acquire('https://b.example.com', 0.2), 0)
+        waited = throttle.acquire('https://a.example.com', 0.2)
+        self.assertGreater(waited, 0.1)
+
+class TestLeadScraper(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.test_dir)
+
+    @patch('scrapers.scraper.RATE_LIMIT_SECONDS', 0.2)
+    def test_sources_are_crawled_in_parallel(self):
+        """Wall time follows the slowest source, not the sum of all sources."""
+        with patch.object(LeadScraper, '_get', side_effect=page_response):
+            scraper = LeadScraper()
+            start = time.monotonic()
+            df = scraper.scrape_leads('real_estate_agents', max_pages=3)
+            elapsed = time.monotonic() - start
+        # 3 sources x 3 pages x 3 listings, in source order
+        self.assertEqual(len(df), 27)
+        self.assertEqual(list(df['name'][:3]), ['ABC Realty', 'XYZ Properties', 'Seaside Homes'])
+        # Each host needs two 0.2s gaps; a sequential crawl of three hosts would need 1.2s
+        self.assertLess(elapsed, 0.9)
+
+    def test_cached_pages_are_not_refetched(self):
+        """A second crawl within the freshness window is served from the page cache."""
+        with patch.object(LeadScraper, '_get', side_effect=page_response) as mock_get, patch('time.sleep'):
+            scraper = LeadScraper(max_age_hours=24)
+            scraper.scrape_leads('tutors_education', max_pages=2)
+            calls = mock_get.call_count
+            df = scraper.scrape_leads('tutors_education', max_pages=2)
+        self.assertEqual(mock_get.call_count, calls)
+        self.assertEqual(len(df), 12)
+
+    def test_stale_page_is_revalidated(self):
+        """A stale cached page is revalidated with its ETag and a 304 refreshes it in place."""
+        url = 'https://www.tutorextra.co.za/tutors/South+Africa'
+        scraper = LeadScraper(max_age_hours=24)
+        scraper.cache.put(url, LISTING_PAGE, fetched_at=time.time() - 48 * 3600, etag='"v1"')
+        not_modified = MagicMock(status_code=304, headers={})
+        with patch.object(LeadScraper, '_get', return_value=not_modified) as mock_get, \
+                patch('scrapers.scraper.RESPECT_ROBOTS_TXT', False):
+            response = scraper.cached_request(url)
+        mock_get.assert_called_once_with(url, headers={'If-None-Match': '"v1"'})
+        self.assertTrue(response.revalidated)
+        self.assertEqual(response.text, LISTING_PAGE)
+        self.assertIsNotNone(scraper.cache.get(url, max_age_hours=24))
+
+    def test_not_modified_page_reuses_its_leads(self):
+        """Leads of a page a 304 confirmed come from the crawl frontier rather than a re-parse."""
+        with patch.object(LeadScraper, '_get', side_effect=page_response), patch('time.sleep'):
+            LeadScraper().scrape_leads('tutors_education', max_pages=1)
+
+        scraper = LeadScraper(max_age_hours=0)
+        not_modified = MagicMock(status_code=304, headers={})
+        with patch.object(LeadScraper, '_get', return_value=not_modified) as mock_get, \
+                patch.object(LeadScraper, 'parse_page') as mock_parse, \
+                patch('scrapers.scraper.RESPECT_ROBOTS_TXT', False), patch('time.sleep'):
+            df = scraper.scrape_leads('tutors_education', max_pages=1)
+        self.assertEqual(mock_get.call_count, 2)
+        mock_parse.assert_not_called()
+        self.assertEqual(len(df), 6)
+        self.assertEqual(list(df['name'][:3]), ['ABC Realty', 'XYZ Properties', 'Seaside Homes'])
+
+    @patch('scrapers.scraper.RESPECT_ROBOTS_TXT', False)
+    def test_retries_keep_to_the_host_rate_limit(self):
+        """A 503 without Retry-After is retried only once the host's throttle allows another request."""
+        busy = MagicMock(status_code=503, headers={})
+        ok = MagicMock(status_code=200, headers={})
+        scraper = LeadScraper()
+        scraper.http.session.get = MagicMock(side_effect=[busy, ok])
+        with patch.object(scraper.throttle, 'acquire') as mock_acquire, patch('time.sleep'):
+            self.assertIs(scraper._get('https://www.property24.com/agents'), ok)
+        mock_acquire.assert_called_once_with('https://www.property24.com', RATE_LIMIT_SECONDS)
+        scraper.close()
+
+    @patch('scrapers.scraper.LEAD_BUFFER_SIZE', 1)
+    def test_iter_leads_stops_when_consumer_stops(self):
+        """Closing the lead generator ends the crawl instead of fetching every page."""
+        with patch.object(LeadScraper, '_get', side_effect=page_response) as mock_get, patch('time.sleep'):
+            scraper = LeadScraper()
+            stream = scraper.iter_leads('real_estate_agents', max_pages=5, max_concurrency=1)
+            first = next(stream)
+            stream.close()
+        self.assertEqual(first['source'], 'Property24')
+        # One robots.txt and one page fetch, not three sources x five pages
+        self.assertEqual(mock_get.call_count, 2)
+
+    def test_target_count_limits_raw_leads(self):
+        """A target count caps the crawl using past per-source yield."""
+        with patch.object(LeadScraper, '_get', side_effect=page_response), patch('time.sleep'):
+            scraper = LeadScraper()
+            for source in ['Property24', 'Private Property', 'Gumtree Property']:
+                scraper.yield_stats.record(source, raw=10, kept=5)
+            df = scraper.scrape_leads('real_estate_agents', max_pages=5, target_count=5)
+        # 5 clean leads at a 50% yield with 20% headroom
+        self.assertEqual(len(df), 12)
+
+    @patch('scrapers.scraper.PARSE_WORKERS', 2)
+    def test_parse_pool_crawl_matches_inline_crawl(self):
+        """Parsing in worker processes finds the same leads as parsing on the crawl threads."""
+        with patch.object(LeadScraper, '_get', side_effect=page_response), patch('time.sleep'):
+            scraper = LeadScraper()
+            try:
+                df = scraper.scrape_leads('real_estate_agents', max_pages=2)
+            finally:
+                scraper.close()
+        self.assertEqual(len(df), 18)
+        self.assertEqual(list(df['name'][:3]), ['ABC Realty', 'XYZ Properties', 'Seaside Homes'])
+        self.assertEqual(LeadScraper().selectors.get('Property24'), 'div')
+
+    def test_resume_replays_crawled_pages(self):
+        """A resumed crawl replays pages already done and only refetches the ones that failed."""
+        def flaky(url, headers=None):
+            if url.endswith('&page=2'):
+                raise ConnectionError('connection reset')
+            return page_response(url, headers)
+
+        with patch.object(LeadScraper, '_get', side_effect=flaky), patch('time.sleep'):
+            df = LeadScraper().scrape_leads('tutors_education', max_pages=2)
+        # Two sources, each with page 1 done and page 2 failed
+        self.assertEqual(len(df), 6)
+
+        scraper = LeadScraper()
+        self.assertEqual(scraper.frontier.progress('tutors_education'), {'done': 2, 'failed': 2})
+        with patch.object(LeadScraper, '_get', side_effect=page_response) as mock_get, \
+                patch.object(LeadScraper, 'parse_page', wraps=scraper.parse_page) as mock_parse, patch('time.sleep'):
+            df = scraper.scrape_leads('tutors_education', max_pages=2, resume=True)
+        self.assertEqual(len(df), 12)
+        self.assertEqual(mock_parse.call_count, 2)
+        fetched = [call.args[0] for call in mock_get.call_args_list if not call.args[0].endswith('robots.txt')]
+        self.assertEqual(len(fetched), 2)
+        self.assertTrue(all(url.endswith('&page=2') for url in fetched))
+        self.assertEqual(scraper.frontier.progress('tutors_education'), {'done': 4})
+
+    def test_selector_is_learned_and_invalidated(self):
+        """The selector that yields leads is remembered per source and dropped when it stops."""
+        scraper = LeadScraper()
+        self.assertEqual(len(scraper.parse_page(LISTING_PAGE, 'real_estate_agents', 'Property24')), 3)
+        self.assertEqual(LeadScraper().selectors.get('Property24'), 'div')
+        self.assertEqual(scraper.parse_page('<html><body></body></html>', 'real_estate_agents', 'Property24'), [])
+        self.assertIsNone(LeadScraper().selectors.get('Property24'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+import os
+import shutil
+import tempfile
+import time
+from unittest.mock import patch
+import pandas as pd
+from store.lead_store import LeadStore, region_of
+from store.snapshots import LeadSnapshots, snapshot_leads, snapshots_available
+
+class TestLeadStore(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.store = LeadStore(os.path.join(self.test_dir, 'leads.db'), batch_size=2)
+        self.leads = [
+            {'name': 'ABC Realty', 'phone': '021 123 4567', 'address': 'N/A', 'category': 'real_estate_agents',
+             'score': 30, 'source': 'Property24'},
+            {'name': 'XYZ Properties', 'phone': '011 987 6543', 'address': '45 Main Rd, Johannesburg',
+             'category': 'real_estate_agents', 'score': 55, 'source': 'Property24'},
+            {'name': 'Seaside Homes', 'phone': 'N/A', 'address': 'Umhlanga, Durban', 'category': 'real_estate_agents',
+             'score': 25, 'source': 'Gumtree Property'},
+        ]
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_upsert_refreshes_existing_leads(self):
+        """A lead seen again keeps first_seen, fills missing fields and records the new source."""
+        self.assertEqual(self.store.upsert(self.leads, niche='real_estate_agents', seen_at=1000), 3)
+        again = {'name': 'ABC Realty (Pty) Ltd', 'phone': '+27 21 123 4567', 'address': '12 Long St, Cape Town',
+                 'category': 'real_estate_agents', 'score': 55, 'source': 'Private Property'}
+        self.store.upsert([again], niche='real_estate_agents', seen_at=2000)
+
+        self.assertEqual(len(self.store), 3)
+        best = self.store.query('real_estate_agents', limit=2)
+        self.assertEqual([lead['name'] for lead in best], ['ABC Realty (Pty) Ltd', 'XYZ Properties'])
+        abc = best[0]
+        self.assertEqual((abc['first_seen'], abc['last_seen']), (1000, 2000))
+        self.assertEqual(abc['address'], '12 Long St, Cape Town')
+        self.assertEqual(abc['region'], 'Cape Town')
+        self.assertEqual(self.store.sources(abc), ['Property24', 'Private Property'])
+
+    def test_query_filters_by_freshness_and_region(self):
+        now = time.time()
+        self.store.upsert(self.leads[:2], niche='real_estate_agents', seen_at=now - 48 * 3600)
+        self.store.upsert(self.leads[2:], niche='real_estate_agents', seen_at=now)
+        self.store.upsert(self.leads[:1], niche='plumbers', seen_at=now)
+
+        self.assertEqual(self.store.count('real_estate_agents'), 3)
+        self.assertEqual([lead['name'] for lead in self.store.query('real_estate_agents', max_age_hours=24)],
+                         ['Seaside Homes'])
+        self.assertEqual(self.store.count(region='Johannesburg'), 1)
+        df = self.store.to_frame('real_estate_agents')
+        self.assertEqual(list(df['id']), [1, 2, 3])
+        self.assertEqual(list(df['name']), ['XYZ Properties', 'ABC Realty', 'Seaside Homes'])
+
+    def test_leads_keep_the_time_their_page_was_fetched(self):
+        """A lead's own seen_at, from a cached page, wins over the time it is stored."""
+        old = dict(self.leads[0], seen_at=time.time() - 70 * 3600)
+        self.store.upsert([old] + self.leads[1:], niche='real_estate_agents')
+        self.assertEqual([lead['name'] for lead in self.store.query('real_estate_agents', max_age_hours=24)],
+                         ['XYZ Properties', 'Seaside Homes'])
+        self.assertEqual(self.store.count('real_estate_agents', max_age_hours=72), 3)
+
+    def test_region_of(self):
+        self.assertEqual(region_of('Sandton, GAUTENG'), 'Gauteng')
+        self.assertIsNone(region_of('N/A'))
+
+@unittest.skipUnless(snapshots_available(), 'pyarrow is not installed')
+class TestLeadSnapshots(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.df = pd.DataFrame([
+            {'name': 'ABC Realty', 'phone': '+27 21 123 4567', 'address': '12 Long St, Cape Town',
+             'category': 'real_estate_agents', 'source': 'Property24', 'score': 60, 'id': 1},
+            {'name': 'XYZ Properties', 'phone': 'N/A', 'address': 'Sandton, GAUTENG',
+             'category': 'real_estate_agents', 'source': 'Property24', 'score': 30, 'id': 2},
+        ])
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_snapshots_partition_by_niche_and_date(self):
+        for format in ['parquet', 'feather']:
+            snapshots = LeadSnapshots(os.path.join(self.test_dir, format), format)
+            snapshots.write(self.df, 'real_estate_agents', '2026-10-17')
+            snapshots.write(self.df.head(1), 'real_estate_agents', '2026-10-18')
+            snapshots.write(self.df.drop(columns=['source', 'id']), 'service_providers', '2026-10-18')
+
+            self.assertEqual(snapshots.partitions(), [('real_estate_agents', '2026-10-17'),
+                                                      ('real_estate_agents', '2026-10-18'),
+                                                      ('service_providers', '2026-10-18')])
+            self.assertEqual(len(snapshots.load()), 5)
+            day = snapshots.load('real_estate_agents', since='2026-10-18')
+            self.assertEqual(list(day['name']), ['ABC Realty'])
+            week = snapshots.load('real_estate_agents', until='2026-10-17', columns=['name', 'city', 'score'])
+            self.assertEqual(list(week['city']), ['Cape Town', 'Gauteng'])
+            self.assertEqual(list(week['score']), [60, 30])
+            for column in ['category', 'city', 'niche', 'date']:
+                self.assertIsInstance(snapshots.load()[column].dtype, pd.CategoricalDtype)
+
+    def test_snapshot_leads_never_raises(self):
+        snapshots = LeadSnapshots(os.path.join(self.test_dir, 'snapshots'))
+        self.assertEqual(snapshot_leads(self.df, 'real_estate_agents', snapshots), 2)
+        with patch.object(LeadSnapshots, 'write', side_effect=OSError('disk full')):
+            self.assertEqual(snapshot_leads(self.df, 'real_estate_agents', snapshots), 0)
+        with patch('store.snapshots.SNAPSHOT_LEADS', False):
+            self.assertEqual(snapshot_leads(self.df, 'real_estate_agents', snapshots), 0)
+        self.assertEqual(len(snapshots.load()), 2)
+
+    def test_load_without_snapshots(self):
+        self.assertTrue(LeadSnapshots(os.path.join(self.test_dir, 'none')).load().empty)
+
+if __name__ == '__main__':
+    unittest.main()